@@ -17,6 +17,9 @@ export interface MLServiceResponse {
 
 export class MLService {
   private static readonly ML_API_URL = config.mlService.url;
+  private static readonly TIMEOUT_MS = 30000;
+  // Budget advertised to the ML service, leaving room for the response to travel back
+  private static readonly DEADLINE_MARGIN_MS = 500;
 
   static async detectDisease(
     imageBase64: string
@@ -28,11 +31,14 @@ export class MLService {
         `${this.ML_API_URL}/ml/detect-disease`,
         {
           image_base64: imageBase64,
+          // Treatments come from TreatmentService, so skip the embedded copies
+          compact: true,
         },
         {
-          timeout: 30000,
+          timeout: this.TIMEOUT_MS,
           headers: {
             'Content-Type': 'application/json',
+            'X-Request-Timeout-Ms': String(this.TIMEOUT_MS - this.DEADLINE_MARGIN_MS),
           },
         }
       );
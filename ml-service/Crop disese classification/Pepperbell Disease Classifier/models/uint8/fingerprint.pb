@@ -0,0 +1 @@
+ރF̛: بҶ(2:'309309440469453160280554122116232069575
\ No newline at end of file
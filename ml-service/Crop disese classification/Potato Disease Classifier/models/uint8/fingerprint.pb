@@ -0,0 +1 @@
+лÌʷט (ނ2:'328904260058676912586917327102985563789
\ No newline at end of file
@@ -0,0 +1 @@
+͊³Џ 햔V(۬˒2:'228527861904635937301940438703777640506
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,4 +9,120 @@ class Settings:
     MODEL_PATH: str = os.getenv("MODEL_PATH", "./models/disease_model.pth")
     DEVICE: str = os.getenv("DEVICE", "cpu")
 
+    # Offline preprocessing: "resize" (fixed model input size) or "native"
+    PREPROCESS_MODE: str = os.getenv("PREPROCESS_MODE", "resize").lower()
+    # Decode JPEGs at a reduced DCT scale close to the target size ("resize" mode only)
+    JPEG_DRAFT_DECODE: bool = os.getenv("JPEG_DRAFT_DECODE", "true").lower() == "true"
+
+    # Upload limits checked from the image header before decoding (0 = no limit)
+    IMAGE_MAX_BYTES: int = int(os.getenv("IMAGE_MAX_BYTES", 20 * 1024 * 1024))
+    IMAGE_MAX_PIXELS: int = int(os.getenv("IMAGE_MAX_PIXELS", 40_000_000))
+    IMAGE_MAX_DIMENSION: int = int(os.getenv("IMAGE_MAX_DIMENSION", 12000))
+    IMAGE_MIN_DIMENSION: int = int(os.getenv("IMAGE_MIN_DIMENSION", 32))
+    # Pillow format IDs accepted; the header parser of any other format never runs
+    IMAGE_ALLOWED_FORMATS: list = [f.strip().upper() for f in os.getenv("IMAGE_ALLOWED_FORMATS", "JPEG,PNG,WEBP").split(",") if f.strip()]
+
+    # Crop model loading: "eager" (all at startup) or "lazy" (on first use)
+    MODEL_LOADING: str = os.getenv("MODEL_LOADING", "eager").lower()
+    MODEL_MEMORY_BUDGET_MB: float = float(os.getenv("MODEL_MEMORY_BUDGET_MB", 0))
+    PRELOAD_CROPS: list = [c.strip().lower() for c in os.getenv("PRELOAD_CROPS", "").split(",") if c.strip()]
+    # Seconds before a crop whose model failed to load is tried again (lazy loading)
+    MODEL_LOAD_RETRY_S: float = float(os.getenv("MODEL_LOAD_RETRY_S", 60))
+    # Concurrent model loads at startup (0 = one per crop)
+    MODEL_LOAD_WORKERS: int = int(os.getenv("MODEL_LOAD_WORKERS", 0))
+    # Load models in the background so /livez and /readyz answer during warm-up
+    BACKGROUND_MODEL_LOADING: bool = os.getenv("BACKGROUND_MODEL_LOADING", "true").lower() == "true"
+    # Seconds between background model self-tests reported by /health (0 = once at startup)
+    SELF_TEST_INTERVAL_S: float = float(os.getenv("SELF_TEST_INTERVAL_S", 30))
+
+    # Backend for every crop: "" = each crop's "backend" in crop_classes.json,
+    # or "savedmodel", "tflite", "mock" (latency-simulating, never loads TensorFlow)
+    MODEL_BACKEND: str = os.getenv("MODEL_BACKEND", "").lower()
+    # Model input dtype: "float32", or "uint8" to preprocess without widening the pixels and
+    # serve the uint8-signature SavedModels from `python -m app.models.uint8_export`. Those are
+    # the augmentation-free graph, so uint8 predictions are deterministic and can differ from
+    # the float32 SavedModels, which still apply random augmentation at inference
+    MODEL_INPUT_DTYPE: str = os.getenv("MODEL_INPUT_DTYPE", "float32").lower()
+    # Mock backend profile: latency of one single-image model call (p50/p99)
+    MOCK_LATENCY_DISTRIBUTION: str = os.getenv("MOCK_LATENCY_DISTRIBUTION", "lognormal").lower()
+    MOCK_LATENCY_P50_MS: float = float(os.getenv("MOCK_LATENCY_P50_MS", 40))
+    MOCK_LATENCY_P99_MS: float = float(os.getenv("MOCK_LATENCY_P99_MS", 120))
+    # Extra latency per additional image in a batch, as a fraction of one call
+    MOCK_BATCH_SCALING: float = float(os.getenv("MOCK_BATCH_SCALING", 0.15))
+    # Share of the latency spent burning CPU; the rest is spent sleeping
+    MOCK_CPU_FRACTION: float = float(os.getenv("MOCK_CPU_FRACTION", 0.5))
+    # Scratch memory held per image while a call runs, and reported model size
+    MOCK_MEMORY_MB: float = float(os.getenv("MOCK_MEMORY_MB", 0))
+    MOCK_MODEL_MB: float = float(os.getenv("MOCK_MODEL_MB", 15))
+    MOCK_LOAD_TIME_MS: float = float(os.getenv("MOCK_LOAD_TIME_MS", 0))
+    # Base seed for reproducible mock runs (empty = fresh entropy)
+    MOCK_SEED = int(os.getenv("MOCK_SEED")) if os.getenv("MOCK_SEED") else None
+
+    # Pre-fork launcher (python -m app.serve): workers (0 = one per CPU) and
+    # TensorFlow threads per worker (intra-op 0 = CPUs // workers)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 0))
+    TF_INTRA_OP_THREADS: int = int(os.getenv("TF_INTRA_OP_THREADS", 0))
+    TF_INTER_OP_THREADS: int = int(os.getenv("TF_INTER_OP_THREADS", 1))
+    # Processes serving this instance; the Gemini quota is split between them (set by app.serve)
+    WORKER_COUNT: int = int(os.getenv("WORKER_COUNT", 1))
+    # Auto-reload on code changes when running `python -m app.main` (development only)
+    UVICORN_RELOAD: bool = os.getenv("UVICORN_RELOAD", "false").lower() == "true"
+
+    # TFLite backend (crops with "backend": "tflite"); 0 = TFLite default
+    TFLITE_NUM_THREADS: int = int(os.getenv("TFLITE_NUM_THREADS", 0))
+
+    # Legacy PyTorch path (app/services/inference.py)
+    # "eager" = nn.Module under no_grad, "torchscript" = traced + frozen under inference_mode
+    TORCH_ENGINE: str = os.getenv("TORCH_ENGINE", "eager")
+    # Intra-op threads for PyTorch; 0 = PyTorch default
+    TORCH_NUM_THREADS: int = int(os.getenv("TORCH_NUM_THREADS", 0))
+    # Channels-last (NHWC) memory layout for the torchscript engine
+    TORCH_CHANNELS_LAST: bool = os.getenv("TORCH_CHANNELS_LAST", "true").lower() == "true"
+
+    # Offline micro-batching
+    BATCHING_ENABLED: bool = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", 8))
+    BATCH_MAX_WAIT_MS: float = float(os.getenv("BATCH_MAX_WAIT_MS", 5))
+    # Images accepted by /ml/detect-disease/batch (grouped into BATCH_MAX_SIZE model calls)
+    BATCH_MAX_IMAGES: int = int(os.getenv("BATCH_MAX_IMAGES", 64))
+    # crop="auto": flag the result as ambiguous when the two best crops' certainties are this close
+    AUTO_CROP_AMBIGUITY_MARGIN: float = float(os.getenv("AUTO_CROP_AMBIGUITY_MARGIN", 0.05))
+
+    # Inference worker pool
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", 8))
+    INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", 32))
+    INFERENCE_RETRY_AFTER_S: int = int(os.getenv("INFERENCE_RETRY_AFTER_S", 1))
+
+    # Request deadlines: default budget when no X-Request-Timeout-Ms header is sent
+    # (0 = none; also caps the header) and client-disconnect polling interval
+    REQUEST_TIMEOUT_S: float = float(os.getenv("REQUEST_TIMEOUT_S", 0))
+    DISCONNECT_POLL_MS: float = float(os.getenv("DISCONNECT_POLL_MS", 50))
+
+    # Offline prediction cache
+    PREDICTION_CACHE_ENABLED: bool = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+    PREDICTION_CACHE_SIZE: int = int(os.getenv("PREDICTION_CACHE_SIZE", 1024))
+    PREDICTION_CACHE_TTL_S: float = float(os.getenv("PREDICTION_CACHE_TTL_S", 600))
+
+    # Client cache lifetime of the /ml/treatments catalog (revalidated with its ETag afterwards)
+    TREATMENTS_MAX_AGE_S: int = int(os.getenv("TREATMENTS_MAX_AGE_S", 3600))
+
+    # Gemini (online mode) scheduling: quota, burst, wait queue and per-request timeout
+    GEMINI_RPM: float = float(os.getenv("GEMINI_RPM", 15))
+    GEMINI_BURST: int = int(os.getenv("GEMINI_BURST", 1))
+    GEMINI_MAX_QUEUE: int = int(os.getenv("GEMINI_MAX_QUEUE", 10))
+    GEMINI_TIMEOUT_S: float = float(os.getenv("GEMINI_TIMEOUT_S", 30))
+    # Pre-upload downscale: longest edge in pixels (0 = send original bytes) and JPEG quality
+    GEMINI_UPLOAD_MAX_EDGE: int = int(os.getenv("GEMINI_UPLOAD_MAX_EDGE", 1024))
+    GEMINI_UPLOAD_QUALITY: int = int(os.getenv("GEMINI_UPLOAD_QUALITY", 85))
+
+    # Online result cache keyed by perceptual hash + crop hint, persisted to ONLINE_CACHE_PATH
+    ONLINE_CACHE_ENABLED: bool = os.getenv("ONLINE_CACHE_ENABLED", "true").lower() == "true"
+    ONLINE_CACHE_SIZE: int = int(os.getenv("ONLINE_CACHE_SIZE", 512))
+    ONLINE_CACHE_TTL_S: float = float(os.getenv("ONLINE_CACHE_TTL_S", 86400))
+    ONLINE_CACHE_MAX_DISTANCE: int = int(os.getenv("ONLINE_CACHE_MAX_DISTANCE", 6))
+    ONLINE_CACHE_PATH: str = os.getenv(
+        "ONLINE_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "farmly_online_cache.json")
+    )
+
 settings = Settings()
@@ -1,13 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 import uvicorn
+import asyncio
+import json
 import os
+import time
 from dotenv import load_dotenv
 from datetime import datetime
 
-from app.services.tf_inference import DiseaseInferenceService
+from app.services.startup import startup_timeline
+
+_app_import_start = time.time()
+from app.config import settings
+from app.services import metrics
+from app.services.deadline import TIMEOUT_HEADER, CancelToken, parse_timeout_header, watch_disconnect
+from app.services.executor import InferenceExecutor, QueueFullError
+from app.services.tf_inference import AUTO_CROP, DiseaseInferenceService
+startup_timeline.record("app_import", _app_import_start, time.time())
 
 load_dotenv()
 
@@ -25,13 +37,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-disease_service = DiseaseInferenceService()
+with startup_timeline.phase("service_init"):
+    disease_service = DiseaseInferenceService(background_load=settings.BACKGROUND_MODEL_LOADING)
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue_size=settings.INFERENCE_QUEUE_SIZE,
+    retry_after=settings.INFERENCE_RETRY_AFTER_S
+)
 
 class DiseaseDetectionRequest(BaseModel):
     image_base64: str
     crop: str
     mode: str = "offline"
     top_k: int = 3
+    compact: bool = False
+
+class BatchImage(BaseModel):
+    image_base64: str
+    crop: Optional[str] = None
+    mode: Optional[str] = None
+    id: Optional[str] = None
+
+class BatchDetectionRequest(BaseModel):
+    images: List[BatchImage]
+    crop: Optional[str] = None
+    mode: str = "offline"
+    top_k: int = 3
+    compact: bool = False
 
 class CropListResponse(BaseModel):
     crops: List[str]
@@ -45,15 +77,20 @@ async def root():
         "status": "running",
         "endpoints": [
             "/health",
+            "/livez",
+            "/readyz",
             "/ml/available-crops",
             "/ml/detect-disease",
-            "/ml/service-info"
+            "/ml/detect-disease/upload",
+            "/ml/detect-disease/batch",
+            "/ml/service-info",
+            "/metrics"
         ]
     }
 
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
+    """Health check endpoint (cached background self-test result, no inference per probe)"""
     health_status = disease_service.health_check()
     
     return {
@@ -63,9 +100,28 @@ async def health():
         "available_crops": health_status.get("available_crops", []),
         "online_mode_available": health_status.get("online_mode_available", False),
         "model_version": health_status.get("model_version", "unknown"),
+        "last_check_age_s": health_status.get("last_check_age_s"),
+        "self_test": health_status.get("self_test", {}),
+        "inference_queue_depth": inference_executor.queue_depth,
         "version": "2.0.0"
     }
 
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is up and serving HTTP (models may still be loading)"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 once models are loaded, 503 while warming up"""
+    readiness = disease_service.readiness()
+    body = {
+        "status": "ready" if readiness["ready"] else "not_ready",
+        **readiness,
+        "startup": startup_timeline.get_timeline()
+    }
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=body)
+
 @app.get("/ml/available-crops", response_model=CropListResponse)
 async def get_available_crops():
     """
@@ -87,67 +143,491 @@ async def get_available_crops():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get crops: {str(e)}")
 
-@app.post("/ml/detect-disease")
-async def detect_disease(request: DiseaseDetectionRequest):
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+@app.get("/ml/treatments")
+async def treatment_catalog(request: Request):
     """
-    Detect crop disease from base64 encoded image
+    Treatment catalog referenced by "treatment_id" in compact responses
     
-    Modes:
-    - offline: Use local TensorFlow models (requires valid crop selection)
-    - online: Use Gemini API (supports "other" crop or any crop for enhanced detection)
+    The body is {"version", "count", "treatments", "default"}, where
+    "treatments" maps treatment IDs to their organic, chemical and
+    preventive advice and "default" is shown for a null treatment_id. The
+    version (also the ETag and "treatments_version" in compact responses)
+    changes whenever the data does; a request with a matching
+    If-None-Match gets 304 without a body.
+    """
+    etag = f'"{disease_service.treatments_version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.TREATMENTS_MAX_AGE_S}"
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=disease_service.treatments_catalog, media_type="application/json", headers=headers)
+
+RAW_IMAGE_CONTENT_TYPES = ["image/jpeg", "image/png", "image/webp", "application/octet-stream"]
+
+# Allowance for multipart boundaries and form fields on top of IMAGE_MAX_BYTES
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+RATE_LIMIT_DETAIL = "AI service rate limit reached. Please wait a moment and try again. The free tier allows 15 requests per minute."
+
+def classify_failure(result: Dict) -> Tuple[int, str, str, Optional[Dict[str, str]]]:
+    """
+    Map an unsuccessful detection result to an HTTP response
     
     Args:
-        request: Disease detection request with image, crop, and mode
+        result: Result dict with "success": False
+        
+    Returns:
+        Tuple of (status code, metrics outcome, detail message, headers or None)
+    """
+    error_message = result.get("error", "Unknown error")
+    error_type = result.get("error_type")
+    
+    if error_type == "not_ready":
+        return 503, "not_ready", error_message, {"Retry-After": str(settings.INFERENCE_RETRY_AFTER_S)}
+    if error_type == "rejected":
+        return 503, "rejected", error_message, {"Retry-After": str(result.get("retry_after", 1))}
+    if error_type == "queue_full":
+        return 503, "gemini_queue_full", error_message, {"Retry-After": str(result.get("retry_after", 1))}
+    if error_type == "deadline_exceeded":
+        return 504, "deadline_exceeded", error_message, None
+    if error_type == "cancelled":
+        return 499, "cancelled", error_message, None
+    if error_type == "image_too_large":
+        return 413, "image_rejected", error_message, None
+    if error_type == "invalid_image":
+        return 422, "image_rejected", error_message, None
+    if error_type == "validation_error":
+        return 400, "bad_request", error_message, None
+    if "not available" in error_message.lower() or "not found" in error_message.lower():
+        return 404, "not_available", error_message, None
+    if "429" in error_message or "rate limit" in error_message.lower() or "resource exhausted" in error_message.lower():
+        return 429, "rate_limited", RATE_LIMIT_DETAIL, None
+    return 500, error_type or "error", error_message, None
+
+def request_cancel_token(http_request: Request) -> CancelToken:
+    """Deadline token from the X-Request-Timeout-Ms header, capped by REQUEST_TIMEOUT_S"""
+    timeout_s = parse_timeout_header(http_request.headers.get(TIMEOUT_HEADER))
+    if settings.REQUEST_TIMEOUT_S > 0:
+        timeout_s = min(timeout_s or settings.REQUEST_TIMEOUT_S, settings.REQUEST_TIMEOUT_S)
+    return CancelToken.from_timeout(timeout_s)
+
+async def run_detection(
+    crop: Optional[str],
+    mode: str,
+    top_k: int,
+    image_base64: Optional[str] = None,
+    image_bytes: Optional[bytes] = None,
+    http_request: Optional[Request] = None,
+    compact: bool = False
+) -> Dict:
+    """
+    Validate detection parameters, run inference and map failures to HTTP errors
+    
+    When the HTTP request is given, its X-Request-Timeout-Ms header (capped
+    by REQUEST_TIMEOUT_S) sets the deadline and a client disconnect cancels
+    the work; either way work that is no longer wanted is skipped at the
+    next stage boundary.
+    
+    Args:
+        crop: Crop type, or "other" for online mode
+        mode: "offline" or "online"
+        top_k: Number of top predictions
+        image_base64: Base64 encoded image (JSON endpoint)
+        image_bytes: Raw encoded image bytes (upload endpoint)
+        http_request: Incoming request, for its deadline header and disconnects
+        compact: Return treatment IDs instead of full treatments (offline mode)
         
     Returns:
         Disease predictions or Gemini analysis based on mode
     """
+    mode_label = mode if mode in ["offline", "online"] else "invalid"
+    crop_label = metrics.crop_label(crop, disease_service.registry.crops + ["auto"])
+    outcome = "error"
+    metrics.IN_FLIGHT.inc(mode=mode_label)
+    cancel = None
+    watcher = None
+    
     try:
-        if not request.image_base64:
-            raise HTTPException(status_code=400, detail="image_base64 is required")
-        
-        if not request.crop:
+        if not crop:
             raise HTTPException(status_code=400, detail="crop is required")
         
-        if request.mode not in ["offline", "online"]:
+        if mode not in ["offline", "online"]:
             raise HTTPException(status_code=400, detail="mode must be 'offline' or 'online'")
         
-        if request.top_k < 1 or request.top_k > 10:
+        if top_k < 1 or top_k > 10:
             raise HTTPException(status_code=400, detail="top_k must be between 1 and 10")
         
-        if request.mode == "offline":
-            result = disease_service.detect_disease_offline(
-                image_base64=request.image_base64,
-                crop=request.crop,
-                top_k=request.top_k
+        if http_request is not None:
+            cancel = request_cancel_token(http_request)
+            watcher = asyncio.create_task(
+                watch_disconnect(http_request, cancel, settings.DISCONNECT_POLL_MS / 1000)
+            )
+        
+        if mode == "offline":
+            result = await inference_executor.run(
+                disease_service.detect_disease_offline,
+                image_base64=image_base64,
+                crop=crop,
+                top_k=top_k,
+                image_bytes=image_bytes,
+                cancel=cancel,
+                compact=compact
             )
         else:
-            crop_hint = None if request.crop.lower() == "other" else request.crop
-            result = disease_service.detect_disease_online(
-                image_base64=request.image_base64,
-                crop=crop_hint
+            crop_hint = None if crop.lower() in ["other", "auto"] else crop
+            result = await disease_service.detect_disease_online(
+                image_base64=image_base64,
+                crop=crop_hint,
+                image_bytes=image_bytes,
+                cancel=cancel
             )
         
         if not result.get("success"):
-            error_message = result.get("error", "Unknown error")
-            print(f"[ERROR] Detection failed: {error_message}")
-            
-            if "not available" in error_message.lower() or "not found" in error_message.lower():
-                raise HTTPException(status_code=404, detail=error_message)
-            elif "429" in error_message or "rate limit" in error_message.lower() or "resource exhausted" in error_message.lower():
-                raise HTTPException(
-                    status_code=429, 
-                    detail="AI service rate limit reached. Please wait a moment and try again. The free tier allows 15 requests per minute."
-                )
-            else:
-                raise HTTPException(status_code=500, detail=error_message)
+            print(f"[ERROR] Detection failed: {result.get('error', 'Unknown error')}")
+            status_code, outcome, detail, headers = classify_failure(result)
+            raise HTTPException(status_code=status_code, detail=detail, headers=headers)
         
+        outcome = "cached" if result.get("cached") else "success"
         return result
         
-    except HTTPException:
+    except QueueFullError as e:
+        outcome = "rejected"
+        raise HTTPException(
+            status_code=503,
+            detail="Inference queue is full. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except HTTPException as e:
+        if e.status_code == 400:
+            outcome = "bad_request"
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        metrics.IN_FLIGHT.dec(mode=mode_label)
+        metrics.REQUESTS.inc(crop=crop_label, mode=mode_label, outcome=outcome)
+
+@app.post("/ml/detect-disease")
+async def detect_disease(request: DiseaseDetectionRequest, http_request: Request):
+    """
+    Detect crop disease from base64 encoded image
+    
+    Modes:
+    - offline: Use local TensorFlow models (requires valid crop selection,
+      or crop="auto" to score every crop model and return the best match)
+    - online: Use Gemini API (supports "other" crop or any crop for enhanced detection)
+    
+    An optional X-Request-Timeout-Ms header gives the caller's remaining time
+    budget; work past it (or for a disconnected client) is skipped.
+    
+    With "compact": true, offline predictions carry only a "treatment_id"
+    into the /ml/treatments catalog instead of the full treatment text.
+    
+    Args:
+        request: Disease detection request with image, crop, and mode
+        http_request: Raw HTTP request (deadline header, disconnect detection)
+        
+    Returns:
+        Disease predictions or Gemini analysis based on mode
+    """
+    if not request.image_base64:
+        raise HTTPException(status_code=400, detail="image_base64 is required")
+    
+    return await run_detection(
+        crop=request.crop,
+        mode=request.mode,
+        top_k=request.top_k,
+        image_base64=request.image_base64,
+        http_request=http_request,
+        compact=request.compact
+    )
+
+def upload_too_large(crop: Optional[str], mode: str, detail: str) -> HTTPException:
+    """Count an upload refused for its size and build its 413 response"""
+    mode_label = mode if mode in ["offline", "online"] else "invalid"
+    metrics.IMAGES_REJECTED.inc(mode=mode_label, reason="bytes")
+    # Same outcome run_detection records for an image refused after the body is read
+    metrics.REQUESTS.inc(
+        crop=metrics.crop_label(crop, disease_service.registry.crops + [AUTO_CROP]),
+        mode=mode_label,
+        outcome="image_rejected"
+    )
+    return HTTPException(status_code=413, detail=detail)
+
+async def read_upload_body(request: Request, max_bytes: int, crop: Optional[str], mode: str) -> bytes:
+    """
+    Read an upload body, refusing it as soon as it grows past max_bytes
+    
+    Covers chunked uploads without a Content-Length, and clients whose
+    Content-Length understates the body.
+    
+    Args:
+        request: Incoming request
+        max_bytes: Largest body accepted (0 = no limit)
+        crop: Crop from the query, for metrics
+        mode: Mode from the query, for metrics
+        
+    Returns:
+        Body bytes
+    """
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if max_bytes and received > max_bytes:
+            raise upload_too_large(
+                crop, mode, f"Upload exceeds {max_bytes} bytes; the image limit is {settings.IMAGE_MAX_BYTES} bytes"
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@app.post("/ml/detect-disease/upload")
+async def detect_disease_upload(
+    request: Request,
+    crop: Optional[str] = None,
+    mode: str = "offline",
+    top_k: int = 3,
+    compact: bool = False
+):
+    """
+    Detect crop disease from a binary image upload
+    
+    Accepts either:
+    - multipart/form-data with an "image" file and optional crop/mode/top_k fields
+    - a raw image body (image/jpeg, image/png, ...) with crop/mode/top_k as query params
+    
+    The encoded bytes go straight to the decoder, skipping the base64 and JSON
+    overhead of /ml/detect-disease. The response schema is identical. A body
+    whose Content-Length already exceeds IMAGE_MAX_BYTES is refused before it
+    is read; any other body is refused as soon as the bytes received exceed it.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    max_body = 0
+    
+    if settings.IMAGE_MAX_BYTES:
+        max_body = settings.IMAGE_MAX_BYTES + (MULTIPART_OVERHEAD_BYTES if content_type == "multipart/form-data" else 0)
+        try:
+            content_length = int(request.headers.get("content-length", 0))
+        except ValueError:
+            content_length = 0
+        if content_length > max_body:
+            raise upload_too_large(
+                crop, mode, f"Image is {content_length} bytes; the limit is {settings.IMAGE_MAX_BYTES} bytes"
+            )
+    
+    if content_type == "multipart/form-data":
+        # Buffer the bounded body where Request.body() caches it, so form() parses it from memory
+        request._body = await read_upload_body(request, max_body, crop, mode)
+        form = await request.form()
+        upload = form.get("image")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="image file is required")
+        
+        image_bytes = await upload.read()
+        crop = form.get("crop", crop)
+        mode = form.get("mode", mode)
+        compact = str(form.get("compact", compact)).lower() in ["true", "1"]
+        try:
+            top_k = int(form.get("top_k", top_k))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="top_k must be an integer")
+    elif content_type in RAW_IMAGE_CONTENT_TYPES:
+        image_bytes = await read_upload_body(request, max_body, crop, mode)
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type. Use multipart/form-data or one of: {', '.join(RAW_IMAGE_CONTENT_TYPES)}"
+        )
+    
+    if not image_bytes:
+        raise HTTPException(status_code=400, detail="image body is required")
+    
+    return await run_detection(
+        crop=crop,
+        mode=mode,
+        top_k=top_k,
+        image_bytes=image_bytes,
+        http_request=request,
+        compact=compact
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus metrics in text exposition format
+    
+    Includes per-stage latency histograms by crop and mode, request counts
+    by outcome, in-flight gauges and Gemini call latency.
+    """
+    metrics.INFERENCE_QUEUE_DEPTH.set(inference_executor.queue_depth)
+    metrics.GEMINI_QUEUE_DEPTH.set(disease_service.gemini_scheduler.queue_depth)
+    metrics.MODELS_LOADED.set(len(disease_service.models))
+    
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.post("/ml/detect-disease/batch")
+async def detect_disease_batch(request: BatchDetectionRequest, http_request: Request):
+    """
+    Detect disease for many images, streaming one NDJSON line per image
+    
+    Each image may set its own crop and mode (defaulting to the request's).
+    Offline images are grouped by crop into batched model calls of up to
+    BATCH_MAX_SIZE images. Lines are written as soon as each group finishes,
+    so they are not in input order: every line carries the input "index",
+    the optional client "id" and an HTTP-style "status". A failing image
+    only produces an error line; the response itself is always 200.
+    
+    The X-Request-Timeout-Ms deadline applies to every image. Work starts
+    only once the response streams; if the client goes away, pending groups
+    are cancelled and running ones stop at their next stage boundary.
+    """
+    if not request.images:
+        raise HTTPException(status_code=400, detail="images must not be empty")
+    
+    if len(request.images) > settings.BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BATCH_MAX_IMAGES} images per batch"
+        )
+    
+    if request.top_k < 1 or request.top_k > 10:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 10")
+    
+    lines: asyncio.Queue = asyncio.Queue()
+    known_crops = disease_service.registry.crops + [AUTO_CROP]
+    cancel = request_cancel_token(http_request)
+    # Images with a job but no line yet, as index -> (crop, mode)
+    pending: Dict[int, Tuple[str, str]] = {}
+    
+    def reject(index: int, crop: str, mode: str, detail: str):
+        mode_label = mode if mode in ["offline", "online"] else "invalid"
+        metrics.REQUESTS.inc(crop=metrics.crop_label(crop, known_crops), mode=mode_label, outcome="bad_request")
+        lines.put_nowait({"index": index, "id": request.images[index].id, "status": 400, "success": False, "error": detail})
+    
+    def emit(index: int, crop: str, mode: str, result: Dict):
+        if result.get("success"):
+            status_code = 200
+            outcome = "cached" if result.get("cached") else "success"
+        else:
+            status_code, outcome, detail, _ = classify_failure(result)
+            result = dict(result, error=detail)
+        
+        pending.pop(index, None)
+        metrics.REQUESTS.inc(crop=metrics.crop_label(crop, known_crops), mode=mode, outcome=outcome)
+        lines.put_nowait({"index": index, "id": request.images[index].id, "status": status_code, **result})
+    
+    async def run_offline_group(crop: str, indices: List[int]):
+        try:
+            results = await inference_executor.run(
+                disease_service.detect_disease_offline_batch,
+                [request.images[i].image_base64 for i in indices],
+                crop,
+                request.top_k,
+                compact=request.compact,
+                cancel=cancel
+            )
+        except QueueFullError as e:
+            results = [{
+                "success": False,
+                "error": "Inference queue is full. Please retry shortly.",
+                "error_type": "rejected",
+                "retry_after": e.retry_after,
+                "mode": "offline"
+            }] * len(indices)
+        except Exception as e:
+            results = [{"success": False, "error": f"Internal server error: {str(e)}", "mode": "offline"}] * len(indices)
+        
+        for index, result in zip(indices, results):
+            emit(index, crop, "offline", result)
+    
+    async def run_single(index: int, crop: str, mode: str):
+        item = request.images[index]
+        try:
+            if mode == "offline":
+                result = await inference_executor.run(
+                    disease_service.detect_disease_offline,
+                    image_base64=item.image_base64,
+                    crop=crop,
+                    top_k=request.top_k,
+                    cancel=cancel,
+                    compact=request.compact
+                )
+            else:
+                result = await disease_service.detect_disease_online(
+                    image_base64=item.image_base64,
+                    crop=None if crop in ["other", AUTO_CROP] else crop,
+                    cancel=cancel
+                )
+        except QueueFullError as e:
+            result = {
+                "success": False,
+                "error": "Inference queue is full. Please retry shortly.",
+                "error_type": "rejected",
+                "retry_after": e.retry_after,
+                "mode": mode
+            }
+        except Exception as e:
+            result = {"success": False, "error": f"Internal server error: {str(e)}", "mode": mode}
+        emit(index, crop, mode, result)
+    
+    offline_groups: Dict[str, List[int]] = {}
+    # (coroutine function, args); coroutines are only created once the response streams
+    jobs = []
+    for index, item in enumerate(request.images):
+        crop = (item.crop or request.crop or "").lower()
+        mode = item.mode or request.mode
+        
+        if not crop:
+            reject(index, crop, mode, "crop is required")
+        elif mode not in ["offline", "online"]:
+            reject(index, crop, mode, "mode must be 'offline' or 'online'")
+        elif mode == "offline" and crop != AUTO_CROP:
+            offline_groups.setdefault(crop, []).append(index)
+            pending[index] = (crop, mode)
+        else:
+            jobs.append((run_single, (index, crop, mode)))
+            pending[index] = (crop, mode)
+    
+    chunk_size = max(1, settings.BATCH_MAX_SIZE)
+    for crop, indices in offline_groups.items():
+        for start in range(0, len(indices), chunk_size):
+            jobs.append((run_offline_group, (crop, indices[start:start + chunk_size])))
+    
+    async def stream():
+        metrics.IN_FLIGHT.inc(mode="batch")
+        tasks = [asyncio.create_task(job(*args)) for job, args in jobs]
+        try:
+            for _ in range(len(request.images)):
+                yield json.dumps(await lines.get()) + "\n"
+        finally:
+            # Client gone or stream done: stop queued work and skip the rest of running work
+            cancel.cancel()
+            for task in tasks:
+                task.cancel()
+            for crop, mode in pending.values():
+                metrics.REQUESTS.inc(crop=metrics.crop_label(crop, known_crops), mode=mode, outcome="cancelled")
+            pending.clear()
+            metrics.IN_FLIGHT.dec(mode="batch")
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 @app.get("/ml/service-info")
 async def service_info():
@@ -159,10 +639,11 @@ async def service_info():
     """
     try:
         info = disease_service.get_service_info()
+        info["inference_executor"] = inference_executor.get_stats()
         return info
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get service info: {str(e)}")
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=settings.UVICORN_RELOAD)
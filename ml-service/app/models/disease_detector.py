@@ -9,20 +9,37 @@ import os
 from typing import List, Dict, Tuple
 import numpy as np
 
+TORCH_ENGINES = ("eager", "torchscript")
+
 
 class DiseaseDetectionModel:
     """Disease detection model wrapper"""
     
-    def __init__(self, num_classes: int = 25, model_path: str = None):
+    def __init__(
+        self, 
+        num_classes: int = 25, 
+        model_path: str = None,
+        engine: str = "eager",
+        channels_last: bool = True
+    ):
         """
         Initialize disease detection model
         
         Args:
             num_classes: Number of disease classes
-            model_path: Path to saved model weights (optional)
+            model_path: Path to saved model weights (optional, local file only)
+            engine: "eager" to run the nn.Module under no_grad, "torchscript"
+                    to trace and freeze it once and run under inference_mode
+            channels_last: Use channels-last (NHWC) memory layout with the
+                    torchscript engine
         """
+        if engine not in TORCH_ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Available: {list(TORCH_ENGINES)}")
+        
         self.num_classes = num_classes
         self.model_path = model_path
+        self.engine = engine
+        self.channels_last = channels_last and engine == "torchscript"
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model = None
         self.classes = self._load_classes()
@@ -42,8 +59,8 @@ class DiseaseDetectionModel:
         return data['classes']
     
     def _create_model(self) -> nn.Module:
-        """Create MobileNetV2 based model"""
-        model = models.mobilenet_v2(pretrained=True)
+        """Create MobileNetV2 based model (architecture only, nothing is downloaded)"""
+        model = models.mobilenet_v2(weights=None)
         
         num_features = model.classifier[1].in_features
         model.classifier[1] = nn.Linear(num_features, self.num_classes)
@@ -51,22 +68,66 @@ class DiseaseDetectionModel:
         return model
     
     def load_model(self):
-        """Load or create model"""
-        self.model = self._create_model()
-        
-        if self.model_path and os.path.exists(self.model_path):
-            print(f"Loading model from {self.model_path}")
-            state_dict = torch.load(self.model_path, map_location=self.device)
-            self.model.load_state_dict(state_dict)
-            print("Model loaded successfully")
-        else:
-            print("Using pre-trained MobileNetV2 base model (fine-tuning needed for production)")
+        """
+        Load model weights from the local model_path and prepare the engine
+        
+        Raises:
+            FileNotFoundError: If model_path is unset or missing (a randomly
+                initialized network would return meaningless diagnoses)
+        """
+        if not self.model_path or not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"Model weights not found at: {self.model_path}. "
+                "Set MODEL_PATH to a trained state dict or use the mock model"
+            )
+        
+        model = self._create_model()
         
-        self.model.to(self.device)
-        self.model.eval()
+        print(f"Loading model from {self.model_path}")
+        state_dict = torch.load(self.model_path, map_location=self.device, weights_only=True)
+        model.load_state_dict(state_dict)
+        print("Model loaded successfully")
         
+        model.to(self.device)
+        model.eval()
+        
+        if self.engine == "torchscript":
+            model = self._compile(model)
+        
+        self.model = model
         return self.model
     
+    def _compile(self, model: nn.Module) -> torch.jit.ScriptModule:
+        """
+        Trace and freeze the model for inference
+        
+        Freezing inlines the weights as constants and folds batch norm into
+        the preceding convolutions. Two warm-up calls let the profiling
+        executor specialize the graph before the first request.
+        
+        Args:
+            model: nn.Module in eval mode
+            
+        Returns:
+            Frozen TorchScript module
+        """
+        example = torch.zeros(1, 3, 224, 224, device=self.device)
+        if self.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+            example = example.contiguous(memory_format=torch.channels_last)
+        
+        with torch.no_grad():
+            traced = torch.jit.trace(model, example)
+        frozen = torch.jit.freeze(traced)
+        
+        with torch.inference_mode():
+            for _ in range(2):
+                frozen(example)
+        
+        print(f"[OK] Compiled TorchScript model (channels_last={self.channels_last}, "
+              f"threads={torch.get_num_threads()})")
+        return frozen
+    
     def predict(self, image_tensor: torch.Tensor, top_k: int = 3) -> List[Dict]:
         """
         Predict disease from image tensor
@@ -82,8 +143,11 @@ class DiseaseDetectionModel:
             self.load_model()
         
         image_tensor = image_tensor.to(self.device)
+        if self.channels_last:
+            image_tensor = image_tensor.contiguous(memory_format=torch.channels_last)
         
-        with torch.no_grad():
+        grad_mode = torch.inference_mode() if self.engine == "torchscript" else torch.no_grad()
+        with grad_mode:
             outputs = self.model(image_tensor)
             probabilities = torch.nn.functional.softmax(outputs, dim=1)
             
@@ -142,6 +206,9 @@ class DiseaseDetectionModel:
             "device": str(self.device),
             "model_loaded": self.model is not None,
             "model_type": "MobileNetV2",
+            "engine": self.engine,
+            "channels_last": self.channels_last,
+            "num_threads": torch.get_num_threads(),
             "classes": len(self.classes)
         }
 
@@ -149,11 +216,17 @@ class DiseaseDetectionModel:
 class MockDiseaseDetectionModel:
     """Mock model for testing when real model is not available"""
     
-    def __init__(self):
-        """Initialize mock model"""
+    def __init__(self, seed: int = None):
+        """
+        Initialize mock model
+        
+        Args:
+            seed: Seed for this instance's random generator (None = fresh entropy)
+        """
         self.device = "cpu"
         self.model = None
         self.classes = self._load_classes()
+        self._rng = np.random.default_rng(seed)
         
     def _load_classes(self) -> List[Dict]:
         """Load disease classes from JSON file"""
@@ -189,11 +262,9 @@ class MockDiseaseDetectionModel:
         if self.model is None:
             self.load_model()
         
-        np.random.seed(42)
-        
-        selected_indices = np.random.choice(len(self.classes), min(top_k, len(self.classes)), replace=False)
+        selected_indices = self._rng.choice(len(self.classes), min(top_k, len(self.classes)), replace=False)
         
-        confidences = np.random.dirichlet(np.ones(top_k))
+        confidences = self._rng.dirichlet(np.ones(top_k))
         confidences = np.sort(confidences)[::-1]
         
         predictions = []
@@ -0,0 +1,90 @@
+"""
+Inference-only graph rebuilt from the crop SavedModels
+
+The exported SavedModels still contain the RandomFlip/RandomRotation
+augmentation block from training, which (a) makes predictions vary between
+calls and (b) uses ops the TFLite builtin runtime cannot convert. All crop
+models share the architecture from the training notebooks:
+
+    Resizing(256) -> Rescaling(1/255) -> [augmentation]
+    -> 6 x (Conv2D 3x3 relu -> MaxPool 2x2) -> Flatten
+    -> Dense(64, relu) -> Dense(num_classes, softmax)
+
+so the same network without the augmentation block can be rebuilt directly
+from the trained variables.
+"""
+from typing import List
+
+import tensorflow as tf
+
+NUM_CONV_LAYERS = 6
+NUM_DENSE_LAYERS = 2
+
+
+class InferenceModule(tf.Module):
+    """Augmentation-free crop classifier built from SavedModel variables"""
+
+    def __init__(self, saved_model, input_size: int = 256, input_dtype: tf.DType = tf.float32):
+        """
+        Initialize module
+
+        Args:
+            saved_model: Object returned by tf.saved_model.load
+            input_size: Spatial size the network was trained on
+            input_dtype: dtype of the serving input (float32 or uint8)
+        """
+        super().__init__()
+        weights = [v for v in saved_model.trainable_variables]
+        expected = 2 * (NUM_CONV_LAYERS + NUM_DENSE_LAYERS)
+        if len(weights) != expected:
+            raise ValueError(
+                f"Unexpected model layout: {len(weights)} trainable variables, expected {expected}"
+            )
+
+        self.input_size = input_size
+        self.input_dtype = input_dtype
+        self.conv = self._pairs(weights[:2 * NUM_CONV_LAYERS])
+        self.dense = self._pairs(weights[2 * NUM_CONV_LAYERS:])
+
+        self.serve = tf.function(
+            self._serve,
+            input_signature=[tf.TensorSpec([None, input_size, input_size, 3], input_dtype, name="image")]
+        )
+
+    @staticmethod
+    def _pairs(variables: List[tf.Variable]) -> List[tuple]:
+        return [
+            (tf.Variable(variables[i], trainable=False), tf.Variable(variables[i + 1], trainable=False))
+            for i in range(0, len(variables), 2)
+        ]
+
+    def _serve(self, image):
+        x = tf.cast(image, tf.float32)
+        x = tf.image.resize(x, (self.input_size, self.input_size))
+        x = x * (1.0 / 255)
+
+        for kernel, bias in self.conv:
+            x = tf.nn.relu(tf.nn.conv2d(x, kernel, strides=1, padding="VALID") + bias)
+            x = tf.nn.max_pool2d(x, ksize=2, strides=2, padding="VALID")
+
+        x = tf.reshape(x, (tf.shape(x)[0], -1))
+
+        (hidden_kernel, hidden_bias), (out_kernel, out_bias) = self.dense
+        x = tf.nn.relu(tf.matmul(x, hidden_kernel) + hidden_bias)
+        return {"output_0": tf.nn.softmax(tf.matmul(x, out_kernel) + out_bias)}
+
+
+def build_inference_module(saved_model_dir: str, input_size: int = 256,
+                           input_dtype: tf.DType = tf.float32) -> InferenceModule:
+    """
+    Load a crop SavedModel and rebuild it without the augmentation block
+
+    Args:
+        saved_model_dir: Path to the SavedModel directory
+        input_size: Spatial input size
+        input_dtype: dtype of the serving input
+
+    Returns:
+        InferenceModule with a `serve` tf.function
+    """
+    return InferenceModule(tf.saved_model.load(saved_model_dir), input_size, input_dtype)
@@ -0,0 +1,199 @@
+"""
+Latency-simulating mock crop model for capacity planning
+"""
+import math
+import threading
+import time
+import zlib
+import numpy as np
+from typing import Dict, Optional
+
+from app.models.tf_disease_detector import TFDiseaseDetector
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# 99th percentile of the standard normal distribution
+Z_99 = 2.326
+
+
+class LatencyModel:
+    """
+    Samples per-call latencies from a distribution given by its p50 and p99
+
+    Every distribution is parameterized the same way so profiles measured on
+    real hardware (e.g. with benchmarks.load_test) can be plugged in directly.
+    """
+
+    def __init__(self, distribution: str, p50_ms: float, p99_ms: float, rng: np.random.Generator):
+        """
+        Initialize latency model
+
+        Args:
+            distribution: "fixed", "uniform", "normal" or "lognormal"
+            p50_ms: Median latency
+            p99_ms: 99th percentile latency (ignored for "fixed")
+            rng: Random generator owned by the caller
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}. Available: {list(LATENCY_DISTRIBUTIONS)}")
+
+        self.distribution = distribution
+        self.p50_ms = max(0.0, p50_ms)
+        self.p99_ms = max(self.p50_ms, p99_ms)
+        self.rng = rng
+
+    def sample(self) -> float:
+        """Draw one latency in milliseconds (never negative)"""
+        spread = self.p99_ms - self.p50_ms
+
+        if self.distribution == "fixed" or spread == 0:
+            return self.p50_ms
+        if self.distribution == "uniform":
+            half_width = spread / 0.98
+            return max(0.0, self.rng.uniform(self.p50_ms - half_width, self.p50_ms + half_width))
+        if self.distribution == "normal":
+            return max(0.0, self.rng.normal(self.p50_ms, spread / Z_99))
+
+        if self.p50_ms == 0:
+            return 0.0
+        sigma = math.log(self.p99_ms / self.p50_ms) / Z_99
+        return self.rng.lognormal(math.log(self.p50_ms), sigma)
+
+
+class MockDiseaseDetector(TFDiseaseDetector):
+    """
+    Drop-in replacement for TFDiseaseDetector that never loads TensorFlow
+
+    Each model call takes a sampled latency, split between CPU work (NumPy
+    matrix products, which release the GIL like TensorFlow kernels do) and
+    sleeping, and holds a scratch allocation per image for its duration.
+    Predictions are random class distributions over the crop's real classes,
+    so responses have the production shape. Each instance owns its random
+    generator, so crops and workers do not share or reset RNG state.
+    """
+
+    def __init__(
+        self,
+        crop: str,
+        distribution: str = "lognormal",
+        p50_ms: float = 40,
+        p99_ms: float = 120,
+        batch_scaling: float = 0.15,
+        cpu_fraction: float = 0.5,
+        memory_mb: float = 0,
+        load_time_ms: float = 0,
+        model_mb: float = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize mock detector for a specific crop
+
+        Args:
+            crop: Crop name (tomato, potato, pepperbell)
+            distribution: Latency distribution of one model call
+            p50_ms: Median latency of a single-image call
+            p99_ms: 99th percentile latency of a single-image call
+            batch_scaling: Extra latency per additional image in a batch,
+                           as a fraction of the sampled latency
+            cpu_fraction: Share of the latency spent burning CPU (rest sleeps)
+            memory_mb: Scratch memory allocated per image while a call runs
+            load_time_ms: Simulated model load time
+            model_mb: Reported model size (used by the registry memory budget)
+            seed: Base seed for reproducible runs (None = fresh entropy)
+        """
+        super().__init__(crop)
+        self.backend = "mock"
+
+        self.batch_scaling = max(0.0, batch_scaling)
+        self.cpu_fraction = min(1.0, max(0.0, cpu_fraction))
+        self.memory_bytes = int(max(0.0, memory_mb) * 1024 * 1024)
+        self.load_time_ms = max(0.0, load_time_ms)
+        self.model_mb = max(0.0, model_mb)
+
+        instance_seed = None if seed is None else [seed, zlib.crc32(self.crop.encode())]
+        self._rng = np.random.default_rng(instance_seed)
+        self._rng_lock = threading.Lock()
+        self.latency = LatencyModel(distribution, p50_ms, p99_ms, self._rng)
+        self._burn_matrix = self._rng.random((128, 128), dtype=np.float32)
+
+        self.calls = 0
+        self.simulated_ms = 0.0
+
+    def load_model(self):
+        """Simulate loading the crop model (no-op if already loaded)"""
+        if self.model is not None:
+            return self.model
+
+        time.sleep(self.load_time_ms / 1000)
+
+        self.model = "mock"
+        self.classes = self.crop_config['classes']
+        self.display_names = self.crop_config['display_names']
+        self.variable_bytes = int(self.model_mb * 1024 * 1024)
+
+        self.warm_up()
+
+        print(f"[OK] Mock {self.crop_config['name']} model ready "
+              f"({self.latency.distribution}, p50 {self.latency.p50_ms} ms, p99 {self.latency.p99_ms} ms)")
+
+        return self.model
+
+    def _get_input_size(self) -> int:
+        return 256
+
+    def _burn_cpu(self, seconds: float):
+        """Keep one core busy for about `seconds`"""
+        until = time.perf_counter() + seconds
+        matrix = self._burn_matrix
+        while time.perf_counter() < until:
+            matrix @ matrix
+
+    def _run_model(self, image_arrays: np.ndarray) -> np.ndarray:
+        """
+        Simulate one model call and return random class probabilities
+
+        Args:
+            image_arrays: Preprocessed images (batch, height, width, 3)
+
+        Returns:
+            Array of shape (batch, num_classes)
+        """
+        batch_size = len(image_arrays)
+        num_classes = len(self.classes) or len(self.crop_config['classes'])
+
+        with self._rng_lock:
+            latency_ms = self.latency.sample() * (1 + self.batch_scaling * (batch_size - 1))
+            probabilities = self._rng.dirichlet(np.full(num_classes, 0.3), size=batch_size)
+
+        start = time.perf_counter()
+        scratch = np.ones(self.memory_bytes * batch_size, dtype=np.uint8) if self.memory_bytes else None
+
+        self._burn_cpu(latency_ms * self.cpu_fraction / 1000)
+        remaining = latency_ms / 1000 - (time.perf_counter() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+        del scratch
+        with self._rng_lock:
+            self.calls += 1
+            self.simulated_ms += latency_ms
+
+        return probabilities.astype(np.float32)
+
+    def get_model_info(self) -> Dict:
+        """Get model information, including the simulated profile"""
+        info = super().get_model_info()
+        info.update({
+            "model_type": "Mock",
+            "mock": {
+                "distribution": self.latency.distribution,
+                "p50_ms": self.latency.p50_ms,
+                "p99_ms": self.latency.p99_ms,
+                "batch_scaling": self.batch_scaling,
+                "cpu_fraction": self.cpu_fraction,
+                "memory_mb_per_image": round(self.memory_bytes / (1024 * 1024), 2),
+                "calls": self.calls,
+                "avg_simulated_ms": round(self.simulated_ms / self.calls, 2) if self.calls else 0
+            }
+        })
+        return info
@@ -3,67 +3,153 @@ TensorFlow-based disease detection model
 """
 import os
 import json
+import time
+import threading
 import numpy as np
-from typing import List, Dict, Optional
-import tensorflow as tf
+from typing import List, Dict, Optional, Sequence, Union
+
+from app.config import settings
+
+BACKENDS = ("savedmodel", "tflite")
+
+# Every crop graph takes raw pixel values and rescales them itself (see inference_graph.py)
+INPUT_RANGE = (0, 255)
+
+# Detectors loaded before the process forked (see app/serve.py), handed out once by create_detector
+_preloaded: Dict[str, "TFDiseaseDetector"] = {}
 
 
 class TFDiseaseDetector:
     """TensorFlow disease detection model wrapper"""
     
-    def __init__(self, crop: str):
+    def __init__(self, crop: str, backend: Optional[str] = None):
         """
         Initialize disease detector for a specific crop
         
         Args:
             crop: Crop name (tomato, potato, pepperbell)
+            backend: Override the crop's "backend" from crop_classes.json
         """
         self.crop = crop.lower()
         self.model = None
+        self.infer = None
+        self._interpreter_lock = threading.Lock()
+        self.input_size = None
+        self.input_dtype = np.float32
+        self.warmup_time_ms = None
+        self.variable_bytes = 0
         self.classes = []
         self.display_names = {}
-        self.crop_config = self._load_crop_config()
-        
-    def _load_crop_config(self) -> Dict:
-        """Load crop configuration from JSON file"""
-        config_path = os.path.join(
-            os.path.dirname(__file__), 
-            '..', 
-            'data', 
-            'crop_classes.json'
-        )
-        
-        with open(config_path, 'r') as f:
-            all_configs = json.load(f)
-        
-        if self.crop not in all_configs:
-            raise ValueError(f"Unknown crop: {self.crop}. Available: {list(all_configs.keys())}")
+        self.crop_config = load_crop_config(self.crop)
+        self.backend = backend or self.crop_config.get('backend', 'savedmodel')
         
-        return all_configs[self.crop]
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend for {self.crop}: {self.backend}. Available: {list(BACKENDS)}")
     
     def load_model(self):
-        """Load TensorFlow SavedModel"""
-        model_path = os.path.join(
-            os.path.dirname(__file__),
-            '..',
-            '..',
-            self.crop_config['model_path']
-        )
+        """Load the crop model with the configured backend (no-op if already loaded)"""
+        if self.model is not None:
+            return self.model
+        
+        if self.backend == "tflite":
+            self._load_tflite()
+        else:
+            self._load_saved_model()
+        
+        self.classes = self.crop_config['classes']
+        self.display_names = self.crop_config['display_names']
         
-        model_path = os.path.normpath(model_path)
+        self.warm_up()
+        
+        print(f"Model loaded successfully. Classes: {len(self.classes)}")
+        
+        return self.model
+    
+    def _load_saved_model(self):
+        """Load TensorFlow SavedModel (the uint8-input export when MODEL_INPUT_DTYPE=uint8)"""
+        if settings.MODEL_INPUT_DTYPE == "uint8":
+            model_path = resolve_uint8_model_path(self.crop_config)
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(
+                    f"uint8 model not found at: {model_path}. "
+                    f"Run: python -m app.models.uint8_export --crops {self.crop}"
+                )
+        else:
+            model_path = resolve_model_path(self.crop_config['model_path'])
         
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model not found at: {model_path}")
         
+        import tensorflow as tf
+        
         print(f"Loading {self.crop_config['name']} model from {model_path}")
         self.model = tf.saved_model.load(model_path)
+        self.infer = self.model.signatures["serving_default"]
+        # Re-exported tf.Modules (e.g. the uint8 export) restore without .variables
+        variables = getattr(self.model, 'variables', None) or self.infer.variables
+        self.variable_bytes = sum(
+            v.shape.num_elements() * v.dtype.size for v in variables
+        )
+    
+    def _load_tflite(self):
+        """Load a converted TFLite model into an interpreter"""
+        tflite_path = self.crop_config.get('tflite_path')
+        if tflite_path:
+            tflite_path = resolve_model_path(tflite_path)
+        else:
+            tflite_path = os.path.join(
+                os.path.dirname(resolve_model_path(self.crop_config['model_path'])),
+                'tflite',
+                'model_dynamic.tflite'
+            )
         
-        self.classes = self.crop_config['classes']
-        self.display_names = self.crop_config['display_names']
+        if not os.path.exists(tflite_path):
+            raise FileNotFoundError(
+                f"TFLite model not found at: {tflite_path}. "
+                f"Run: python -m app.models.tflite_converter --crops {self.crop}"
+            )
         
-        print(f"Model loaded successfully. Classes: {len(self.classes)}")
+        import tensorflow as tf
         
-        return self.model
+        print(f"Loading {self.crop_config['name']} TFLite model from {tflite_path}")
+        self.model = tf.lite.Interpreter(
+            model_path=tflite_path,
+            num_threads=settings.TFLITE_NUM_THREADS or None
+        )
+        self.model.allocate_tensors()
+        self.variable_bytes = os.path.getsize(tflite_path)
+    
+    def unload(self):
+        """Release the loaded model so its memory can be reclaimed"""
+        self.model = None
+        self.infer = None
+    
+    def _get_input_size(self) -> int:
+        """Read the spatial input size (and input dtype) from the serving signature"""
+        if self.backend == "tflite":
+            input_details = self.model.get_input_details()[0]
+            self.input_dtype = input_details['dtype']
+            return int(input_details['shape'][1])
+        
+        input_specs = list(self.infer.structured_input_signature[1].values())
+        if input_specs:
+            self.input_dtype = input_specs[0].dtype.as_numpy_dtype
+        if input_specs and input_specs[0].shape.rank == 4 and input_specs[0].shape[1]:
+            return int(input_specs[0].shape[1])
+        return 256
+    
+    def warm_up(self):
+        """
+        Run one inference at the fixed input shape
+        
+        The first call through a signature initializes kernels and allocations,
+        so doing it at load time keeps that cost out of the first request.
+        """
+        self.input_size = self._get_input_size()
+        
+        start = time.time()
+        self._run_model(np.zeros((1, self.input_size, self.input_size, 3), dtype=self.input_dtype))
+        self.warmup_time_ms = int((time.time() - start) * 1000)
     
     def predict(self, image_array: np.ndarray, top_k: int = 3) -> List[Dict]:
         """
@@ -76,18 +162,124 @@ class TFDiseaseDetector:
         Returns:
             List of prediction dictionaries
         """
+        return self.predict_batch(image_array, top_k=top_k)[0]
+    
+    def predict_batch(
+        self, 
+        image_arrays: np.ndarray, 
+        top_k: Union[int, Sequence[int]] = 3
+    ) -> List[List[Dict]]:
+        """
+        Predict diseases for a batch of preprocessed images in one model call
+        
+        Args:
+            image_arrays: Preprocessed images (batch, height, width, 3)
+            top_k: Number of top predictions, shared or one per image
+            
+        Returns:
+            One list of prediction dictionaries per image
+        """
         if self.model is None:
             self.load_model()
         
-        infer = self.model.signatures["serving_default"]
+        batch_predictions = self._run_model(image_arrays)
         
-        input_tensor = tf.convert_to_tensor(image_array, dtype=tf.float32)
+        if isinstance(top_k, int):
+            top_k = [top_k] * len(batch_predictions)
         
-        output = infer(input_tensor)
+        return [
+            self._format_predictions(predictions, k)
+            for predictions, k in zip(batch_predictions, top_k)
+        ]
+    
+    def _run_model(self, image_arrays: np.ndarray) -> np.ndarray:
+        """
+        Run the loaded model and return class probabilities
+        
+        Images are cast to the model's input dtype at this boundary, so
+        float32 and uint8 preprocessing both work with either signature
+        (no copy when they already match).
+        
+        Args:
+            image_arrays: Preprocessed images (batch, height, width, 3)
+            
+        Returns:
+            Array of shape (batch, num_classes)
+        """
+        if self.backend == "tflite":
+            return self._run_tflite(image_arrays)
+        
+        import tensorflow as tf
+        
+        input_tensor = tf.convert_to_tensor(self._cast_input(image_arrays))
+        
+        output = self.infer(input_tensor)
         
         output_key = list(output.keys())[0]
-        predictions = output[output_key].numpy()[0]
+        return output[output_key].numpy()
+    
+    def _cast_input(self, image_arrays: np.ndarray) -> np.ndarray:
+        """
+        Convert images to the model's input dtype
+        
+        Float pixels headed for a uint8 signature are rounded and clipped
+        rather than truncated. Float input outside INPUT_RANGE (e.g. pixels
+        already normalized to [-1, 1]) is rejected, since the model would
+        rescale it a second time.
+        
+        Args:
+            image_arrays: Preprocessed images (batch, height, width, 3)
+            
+        Returns:
+            Array of self.input_dtype (the input itself if it already matches)
+        """
+        image_arrays = np.asarray(image_arrays)
+        if image_arrays.dtype == self.input_dtype:
+            return image_arrays
         
+        if np.issubdtype(image_arrays.dtype, np.floating) and image_arrays.size:
+            low, high = float(image_arrays.min()), float(image_arrays.max())
+            if low < INPUT_RANGE[0] or high > INPUT_RANGE[1]:
+                raise ValueError(
+                    f"Input pixels span [{low:g}, {high:g}]; {self.crop} model expects raw pixels in "
+                    f"[{INPUT_RANGE[0]}, {INPUT_RANGE[1]}]"
+                )
+            if np.issubdtype(self.input_dtype, np.integer):
+                return np.clip(np.rint(image_arrays), *INPUT_RANGE).astype(self.input_dtype)
+        
+        return image_arrays.astype(self.input_dtype)
+    
+    def _run_tflite(self, image_arrays: np.ndarray) -> np.ndarray:
+        """Run a batch through the TFLite interpreter (one caller at a time)"""
+        if image_arrays.shape[1:3] != (self.input_size, self.input_size):
+            import tensorflow as tf
+            image_arrays = tf.image.resize(image_arrays, (self.input_size, self.input_size)).numpy()
+        image_arrays = np.ascontiguousarray(self._cast_input(image_arrays))
+        
+        with self._interpreter_lock:
+            interpreter = self.model
+            input_details = interpreter.get_input_details()[0]
+            output_details = interpreter.get_output_details()[0]
+            
+            if tuple(input_details['shape']) != image_arrays.shape:
+                interpreter.resize_tensor_input(input_details['index'], image_arrays.shape)
+                interpreter.allocate_tensors()
+            
+            interpreter.set_tensor(input_details['index'], image_arrays)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_details['index']).copy()
+    
+    def _format_predictions(self, predictions: np.ndarray, top_k: int) -> List[Dict]:
+        """
+        Convert one row of class probabilities into prediction dictionaries
+        
+        Args:
+            predictions: Class probabilities for a single image
+            top_k: Number of top predictions to return
+            
+        Returns:
+            List of prediction dictionaries
+        """
         top_indices = np.argsort(predictions)[-top_k:][::-1]
         top_probs = predictions[top_indices]
         
@@ -140,13 +332,55 @@ class TFDiseaseDetector:
             "crop": self.crop_config['name'],
             "num_classes": len(self.classes),
             "model_loaded": self.model is not None,
-            "model_type": "TensorFlow SavedModel",
+            "model_type": "TFLite" if self.backend == "tflite" else "TensorFlow SavedModel",
+            "backend": self.backend,
+            "input_size": self.input_size,
+            "input_dtype": np.dtype(self.input_dtype).name,
+            "warmup_time_ms": self.warmup_time_ms,
+            "variable_bytes": self.variable_bytes,
             "classes": self.classes
         }
 
 
-def get_available_crops() -> List[str]:
-    """Get list of available crops"""
+def create_detector(crop: str) -> TFDiseaseDetector:
+    """
+    Create an unloaded detector for a crop with the configured backend
+    
+    MODEL_BACKEND overrides every crop's "backend" from crop_classes.json;
+    "mock" returns a latency-simulating MockDiseaseDetector that never
+    imports TensorFlow.
+    """
+    preloaded = _preloaded.pop(crop.lower(), None)
+    if preloaded is not None:
+        return preloaded
+    
+    backend = settings.MODEL_BACKEND or load_crop_config(crop.lower()).get('backend', 'savedmodel')
+    
+    if backend == "mock":
+        from app.models.mock_detector import MockDiseaseDetector
+        return MockDiseaseDetector(
+            crop,
+            distribution=settings.MOCK_LATENCY_DISTRIBUTION,
+            p50_ms=settings.MOCK_LATENCY_P50_MS,
+            p99_ms=settings.MOCK_LATENCY_P99_MS,
+            batch_scaling=settings.MOCK_BATCH_SCALING,
+            cpu_fraction=settings.MOCK_CPU_FRACTION,
+            memory_mb=settings.MOCK_MEMORY_MB,
+            load_time_ms=settings.MOCK_LOAD_TIME_MS,
+            model_mb=settings.MOCK_MODEL_MB,
+            seed=settings.MOCK_SEED
+        )
+    
+    return TFDiseaseDetector(crop, backend=backend)
+
+
+def register_preloaded(detector: TFDiseaseDetector):
+    """Hand a loaded detector to the next create_detector call for its crop"""
+    _preloaded[detector.crop] = detector
+
+
+def _load_all_crop_configs() -> Dict:
+    """Load all crop configurations from JSON file"""
     config_path = os.path.join(
         os.path.dirname(__file__), 
         '..', 
@@ -155,6 +389,36 @@ def get_available_crops() -> List[str]:
     )
     
     with open(config_path, 'r') as f:
-        configs = json.load(f)
+        return json.load(f)
+
+
+def load_crop_config(crop: str) -> Dict:
+    """Load configuration for one crop"""
+    all_configs = _load_all_crop_configs()
     
-    return list(configs.keys())
+    if crop not in all_configs:
+        raise ValueError(f"Unknown crop: {crop}. Available: {list(all_configs.keys())}")
+    
+    return all_configs[crop]
+
+
+def resolve_model_path(relative_path: str) -> str:
+    """Resolve a model path from crop_classes.json relative to the ml-service root"""
+    return os.path.normpath(os.path.join(
+        os.path.dirname(__file__),
+        '..',
+        '..',
+        relative_path
+    ))
+
+
+def resolve_uint8_model_path(crop_config: Dict) -> str:
+    """Path of a crop's uint8-input export ("uint8_model_path", or models/uint8 next to the SavedModel)"""
+    if crop_config.get('uint8_model_path'):
+        return resolve_model_path(crop_config['uint8_model_path'])
+    return os.path.join(os.path.dirname(resolve_model_path(crop_config['model_path'])), 'uint8')
+
+
+def get_available_crops() -> List[str]:
+    """Get list of available crops"""
+    return list(_load_all_crop_configs().keys())
@@ -0,0 +1,163 @@
+"""
+Convert crop SavedModels to quantized TFLite models
+
+Usage:
+    python -m app.models.tflite_converter                       # all crops, dynamic range
+    python -m app.models.tflite_converter --quantization int8 --samples path/to/leaves
+    python -m app.models.tflite_converter --crops tomato --quantization float16
+    python -m app.models.tflite_converter --input-dtype uint8   # uint8 pixels, cast in the graph
+
+Files are written next to each SavedModel as models/tflite/model_<quantization>.tflite
+(model_<quantization>_uint8.tflite with --input-dtype uint8).
+Set "backend": "tflite" (and "tflite_path" if not using the dynamic model) for a
+crop in app/data/crop_classes.json to serve it through the TFLite interpreter.
+"""
+import argparse
+import os
+from typing import Iterator, List, Optional
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from app.models.inference_graph import build_inference_module
+from app.models.tf_disease_detector import get_available_crops, load_crop_config, resolve_model_path
+
+QUANTIZATIONS = ("float32", "dynamic", "float16", "int8")
+INPUT_DTYPES = ("float32", "uint8")
+
+
+def synthetic_images(count: int, size: int = 256, seed: int = 0) -> Iterator[np.ndarray]:
+    """
+    Generate smooth random RGB images in the [0, 255] input range
+
+    Args:
+        count: Number of images
+        size: Width and height
+        seed: Random seed
+
+    Yields:
+        float32 arrays of shape (1, size, size, 3)
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        coarse = rng.uniform(0, 255, size=(8, 8, 3)).astype(np.uint8)
+        image = Image.fromarray(coarse).resize((size, size), Image.Resampling.BICUBIC)
+        array = np.asarray(image, dtype=np.float32) + rng.normal(0, 8, size=(size, size, 3))
+        yield np.clip(array, 0, 255).astype(np.float32)[np.newaxis]
+
+
+def sample_images(directory: str, count: int, size: int = 256) -> Iterator[np.ndarray]:
+    """
+    Load sample images from a directory tree, resized to the model input
+
+    Args:
+        directory: Directory searched recursively for JPEG/PNG files
+        count: Maximum number of images
+        size: Width and height
+
+    Yields:
+        float32 arrays of shape (1, size, size, 3)
+    """
+    paths: List[str] = []
+    for root, _, files in os.walk(directory):
+        paths.extend(
+            os.path.join(root, f) for f in sorted(files)
+            if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+        )
+
+    rng = np.random.default_rng(0)
+    rng.shuffle(paths)
+    for path in paths[:count]:
+        image = Image.open(path).convert('RGB').resize((size, size), Image.Resampling.BILINEAR)
+        yield np.asarray(image, dtype=np.float32)[np.newaxis]
+
+
+def convert_crop(
+    crop: str,
+    quantization: str = "dynamic",
+    samples_dir: Optional[str] = None,
+    num_samples: int = 100,
+    output_dir: Optional[str] = None,
+    input_dtype: str = "float32"
+) -> str:
+    """
+    Convert one crop model to TFLite
+
+    Args:
+        crop: Crop name from crop_classes.json
+        quantization: One of float32, dynamic, float16, int8
+        samples_dir: Images for the int8 representative dataset (synthetic if None)
+        num_samples: Number of representative images
+        output_dir: Output directory (default: models/tflite next to the SavedModel)
+        input_dtype: Input tensor dtype, "float32" or "uint8" (cast to float32 in the graph)
+
+    Returns:
+        Path of the written .tflite file
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}. Available: {list(QUANTIZATIONS)}")
+    if input_dtype not in INPUT_DTYPES:
+        raise ValueError(f"Unknown input dtype: {input_dtype}. Available: {list(INPUT_DTYPES)}")
+
+    model_path = resolve_model_path(load_crop_config(crop)['model_path'])
+    module = build_inference_module(model_path, input_dtype=tf.as_dtype(input_dtype))
+    concrete = module.serve.get_concrete_function()
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], module)
+
+    if quantization != "float32":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    if quantization == "int8":
+        def representative_dataset():
+            images = (
+                sample_images(samples_dir, num_samples, module.input_size)
+                if samples_dir else synthetic_images(num_samples, module.input_size)
+            )
+            for image in images:
+                yield [np.round(image).astype(np.uint8) if input_dtype == "uint8" else image]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    tflite_model = converter.convert()
+
+    suffix = "_uint8" if input_dtype == "uint8" else ""
+    if output_dir:
+        filename = f"{crop}_model_{quantization}{suffix}.tflite"
+    else:
+        output_dir = os.path.join(os.path.dirname(model_path), "tflite")
+        filename = f"model_{quantization}{suffix}.tflite"
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, filename)
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crops", default="all", help="Comma separated crops or 'all'")
+    parser.add_argument("--quantization", default="dynamic", choices=QUANTIZATIONS)
+    parser.add_argument("--samples", help="Directory of sample images for int8 calibration")
+    parser.add_argument("--num-samples", type=int, default=100)
+    parser.add_argument("--output-dir", help="Override output directory")
+    parser.add_argument("--input-dtype", default="float32", choices=INPUT_DTYPES)
+    args = parser.parse_args()
+
+    crops = get_available_crops() if args.crops == "all" else args.crops.split(",")
+    for crop in crops:
+        try:
+            path = convert_crop(
+                crop, args.quantization, args.samples, args.num_samples, args.output_dir, args.input_dtype
+            )
+            print(f"[OK] {crop}: {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+        except Exception as e:
+            print(f"[FAIL] {crop}: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Re-export crop SavedModels with a uint8 input signature
+
+Usage:
+    python -m app.models.uint8_export                  # all crops
+    python -m app.models.uint8_export --crops tomato --samples path/to/leaves
+
+The exported model is the augmentation-free inference graph (see
+app/models/inference_graph.py) taking uint8 pixels and casting them to
+float32 inside the graph, so requests ship a 1-byte-per-channel tensor
+instead of a 4-byte one. Models are written next to each SavedModel as
+models/uint8 (or to "uint8_model_path" from crop_classes.json) and are
+served when MODEL_INPUT_DTYPE=uint8.
+
+The export is therefore not the model MODEL_INPUT_DTYPE=float32 serves: the
+original SavedModel still runs its random augmentation block at inference,
+so its predictions vary from call to call. After saving, every crop is
+checked twice:
+
+- against the float32 rebuild of the same graph: probabilities must be
+  bitwise identical (the dtype changes nothing)
+- against the served SavedModel: the original is run --original-runs times
+  and its majority top-1 label per image is the reference. The export must
+  agree with that reference at least as often as a single further call of
+  the original does
+"""
+import argparse
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import tensorflow as tf
+
+from app.models.inference_graph import build_inference_module
+from app.models.tflite_converter import sample_images, synthetic_images
+from app.models.tf_disease_detector import (
+    get_available_crops,
+    load_crop_config,
+    resolve_model_path,
+    resolve_uint8_model_path
+)
+
+
+def export_crop(crop: str, output_dir: Optional[str] = None) -> str:
+    """
+    Export one crop model with a uint8 serving signature
+
+    Args:
+        crop: Crop name from crop_classes.json
+        output_dir: Output directory (default: "uint8_model_path" from crop_classes.json)
+
+    Returns:
+        Path of the written SavedModel directory
+    """
+    model_path = resolve_model_path(load_crop_config(crop)['model_path'])
+    module = build_inference_module(model_path, input_dtype=tf.uint8)
+
+    output_dir = output_dir or resolve_uint8_model_path(load_crop_config(crop))
+    tf.saved_model.save(module, output_dir, signatures={"serving_default": module.serve})
+    return output_dir
+
+
+def verify_export(
+    crop: str,
+    export_dir: str,
+    samples_dir: Optional[str] = None,
+    num_samples: int = 32,
+    original_runs: int = 9
+) -> Dict:
+    """
+    Compare an exported uint8 model with the float32 models it replaces
+
+    Args:
+        crop: Crop name
+        export_dir: uint8 SavedModel directory
+        samples_dir: Real images to compare on (synthetic if None)
+        num_samples: Number of images
+        original_runs: Calls of the served SavedModel; all but the first
+                       form the majority-vote reference
+
+    Returns:
+        {"images", "bitwise_identical", "max_abs_diff_rebuilt",
+         "top1_agreement_original", "original_self_agreement", "passed"}
+    """
+    model_path = resolve_model_path(load_crop_config(crop)['model_path'])
+    original = tf.saved_model.load(model_path).signatures["serving_default"]
+    rebuilt = build_inference_module(model_path)
+    exported = tf.saved_model.load(export_dir).signatures["serving_default"]
+
+    images = sample_images(samples_dir, num_samples) if samples_dir else synthetic_images(num_samples)
+    # Preprocessed images are whole numbers in [0, 255], so the uint8 tensor holds the same values
+    batch = np.concatenate([np.round(image) for image in images], axis=0)
+
+    original_top1 = np.stack([
+        list(original(tf.constant(batch)).values())[0].numpy().argmax(1)
+        for _ in range(max(2, original_runs))
+    ])
+    rebuilt_probs = rebuilt.serve(tf.constant(batch))["output_0"].numpy()
+    exported_probs = list(exported(tf.constant(batch.astype(np.uint8))).values())[0].numpy()
+
+    # Majority label per image over the reference calls (ties go to the lower class index)
+    num_classes = exported_probs.shape[1]
+    votes = np.apply_along_axis(np.bincount, 0, original_top1[1:], minlength=num_classes)
+    reference = votes.argmax(0)
+
+    bitwise_identical = bool(np.array_equal(exported_probs, rebuilt_probs))
+    top1_agreement = float((exported_probs.argmax(1) == reference).mean())
+    self_agreement = float((original_top1[0] == reference).mean())
+    return {
+        "images": len(batch),
+        "bitwise_identical": bitwise_identical,
+        "max_abs_diff_rebuilt": float(np.abs(exported_probs - rebuilt_probs).max()),
+        "top1_agreement_original": top1_agreement,
+        "original_self_agreement": self_agreement,
+        "passed": bitwise_identical and top1_agreement >= self_agreement,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crops", default="all", help="Comma separated crops or 'all'")
+    parser.add_argument("--output-dir", help="Override output directory (one subdirectory per crop)")
+    parser.add_argument("--samples", help="Directory of sample images for the verification")
+    parser.add_argument("--num-samples", type=int, default=32)
+    parser.add_argument("--original-runs", type=int, default=9, help="Calls of the served SavedModel to vote over")
+    args = parser.parse_args()
+
+    crops = get_available_crops() if args.crops == "all" else args.crops.split(",")
+    for crop in crops:
+        try:
+            output_dir = os.path.join(args.output_dir, crop) if args.output_dir else None
+            path = export_crop(crop, output_dir)
+            check = verify_export(crop, path, args.samples, args.num_samples, args.original_runs)
+        except Exception as e:
+            print(f"[FAIL] {crop}: {str(e)}")
+            continue
+
+        status = "OK" if check["passed"] else "FAIL"
+        print(f"[{status}] {crop}: {path} (bitwise identical to float32 rebuild: {check['bitwise_identical']}, "
+              f"top-1 agreement with the served model's majority: {check['top1_agreement_original']:.0%}, "
+              f"one more call of the served model: {check['original_self_agreement']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
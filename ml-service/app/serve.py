@@ -0,0 +1,282 @@
+"""
+Pre-fork production launcher for the ML service
+
+The parent process imports the heavy modules (TensorFlow, NumPy, PIL,
+FastAPI), binds the listening socket and then forks N uvicorn workers that
+accept on the shared socket. Imported code is shared copy-on-write.
+
+TFLite is the prefork backend. With one interpreter thread per worker
+(TFLITE_NUM_THREADS=1, the default when there are at least as many workers
+as CPUs), the parent builds and warms up every TFLite interpreter, so the
+weights XNNPACK repacks at load time sit in pages the workers share
+copy-on-write. A multi-threaded interpreter owns a thread pool that does not
+survive fork(), so with TFLITE_NUM_THREADS > 1 the workers build their own
+interpreters after the fork (the mmapped .tflite file is still shared
+through the page cache). A SavedModel loaded in the parent deadlocks the
+first inference in a child, so SavedModels are always loaded per worker and
+the default backend keeps one copy of every model per worker. Mock models
+(pure NumPy) are always preloaded.
+
+Each worker sets TensorFlow intra-op threads to CPUs // workers and inter-op
+threads to TF_INTER_OP_THREADS before its runtime starts, so N workers do
+not oversubscribe the node, and WORKER_COUNT = N so that together they stay
+within GEMINI_RPM. The parent restarts workers that exit and logs
+per-worker RSS, PSS (RSS with shared pages split between the processes
+sharing them) and throughput every --stats-interval seconds.
+
+Usage:
+    python -m app.serve --workers 4
+    WEB_CONCURRENCY=4 PORT=8000 python -m app.serve
+"""
+import argparse
+import ctypes
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+# Backends whose loaded models hold no threads or TensorFlow runtime state
+# (TFLite only with a single interpreter thread, see fork_safe())
+FORK_SAFE_BACKENDS = ("mock", "tflite")
+
+# prctl option asking the kernel to signal this process when its parent dies (Linux)
+PR_SET_PDEATHSIG = 1
+
+
+def memory_stats(pid: int) -> Dict[str, float]:
+    """RSS, PSS and USS of a process in MB, from /proc/<pid>/smaps_rollup (empty if unavailable)"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].endswith(":"):
+                    fields[parts[0][:-1]] = int(parts[1])
+    except (OSError, ValueError):
+        return {}
+
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def default_threads(workers: int) -> int:
+    """Intra-op threads per worker so that all workers together use each CPU once"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def fork_safe(backend: str) -> bool:
+    """Whether a model of this backend can be loaded in the parent and used by forked workers"""
+    if backend == "tflite":
+        return settings.TFLITE_NUM_THREADS == 1
+    return backend in FORK_SAFE_BACKENDS
+
+
+def preload_shared_models() -> List[str]:
+    """
+    Load every crop whose backend is fork-safe (mock, single-threaded TFLite) in the parent process
+
+    Returns:
+        Crops that were preloaded
+    """
+    from app.models.tf_disease_detector import create_detector, get_available_crops, register_preloaded
+
+    crops = settings.PRELOAD_CROPS if settings.MODEL_LOADING == "lazy" else get_available_crops()
+    preloaded = []
+    for crop in crops:
+        detector = create_detector(crop)
+        if not fork_safe(detector.backend):
+            continue
+        try:
+            detector.load_model()
+        except Exception as e:
+            print(f"[FAIL] Could not preload {crop} model in parent: {str(e)}")
+            continue
+        register_preloaded(detector)
+        preloaded.append(crop)
+    return preloaded
+
+
+class Supervisor:
+    """Forks workers on a shared socket, restarts them and reports their stats"""
+
+    def __init__(self, sock: socket.socket, workers: int, intra_threads: int, inter_threads: int, args):
+        self.sock = sock
+        self.workers = workers
+        self.intra_threads = intra_threads
+        self.inter_threads = inter_threads
+        self.args = args
+
+        self.pids: Dict[int, int] = {}
+        self.requests = multiprocessing.RawArray(ctypes.c_long, workers)
+        self._last_requests = [0] * workers
+        self._last_stats = time.monotonic()
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.run_worker(index)
+            except BaseException as e:
+                print(f"[FAIL] Worker {index} crashed: {str(e)}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.pids[pid] = index
+        print(f"[OK] Started worker {index} (pid {pid})")
+
+    def run_worker(self, index: int):
+        """Worker body: configure threads, build the app and serve the shared socket"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            ctypes.CDLL(None).prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+        except (OSError, AttributeError):
+            pass
+
+        if settings.MODEL_BACKEND != "mock":
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(self.intra_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(self.inter_threads)
+
+        settings.BACKGROUND_MODEL_LOADING = False
+        settings.WORKER_COUNT = self.workers
+
+        import uvicorn
+        from app.main import app
+
+        requests = self.requests
+
+        @app.middleware("http")
+        async def count_requests(request, call_next):
+            response = await call_next(request)
+            requests[index] += 1
+            response.headers["X-Worker-Pid"] = str(os.getpid())
+            return response
+
+        config = uvicorn.Config(
+            app,
+            log_level=self.args.log_level,
+            access_log=self.args.access_log,
+            timeout_keep_alive=self.args.keep_alive
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def report(self):
+        """Print per-worker memory and throughput since the last report"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_stats, 1e-6)
+        parent = memory_stats(os.getpid())
+        print(f"[OK] parent pid {os.getpid()}: rss {parent.get('rss_mb')} MB, pss {parent.get('pss_mb')} MB")
+
+        total_pss = parent.get("pss_mb", 0)
+        total_rps = 0.0
+        for pid, index in sorted(self.pids.items(), key=lambda item: item[1]):
+            count = self.requests[index]
+            rps = (count - self._last_requests[index]) / elapsed
+            self._last_requests[index] = count
+            stats = memory_stats(pid)
+            total_pss += stats.get("pss_mb", 0)
+            total_rps += rps
+            print(f"[OK] worker {index} pid {pid}: rss {stats.get('rss_mb')} MB, pss {stats.get('pss_mb')} MB, "
+                  f"uss {stats.get('uss_mb')} MB, {count} requests, {rps:.1f} req/s")
+        print(f"[OK] total: pss {total_pss:.1f} MB, {total_rps:.1f} req/s")
+        self._last_stats = now
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(self.workers):
+            self.spawn(index)
+
+        next_report = time.monotonic() + self.args.stats_interval
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if pid:
+                index = self.pids.pop(pid)
+                if not self.stopping:
+                    print(f"[FAIL] Worker {index} (pid {pid}) exited with status {status}; restarting")
+                    time.sleep(1)
+                    self.spawn(index)
+                continue
+
+            if self.args.stats_interval > 0 and time.monotonic() >= next_report and not self.stopping:
+                self.report()
+                next_report = time.monotonic() + self.args.stats_interval
+            time.sleep(0.2)
+
+        print("[OK] All workers stopped")
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Create the listening socket shared by all workers"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or os.cpu_count() or 1)
+    parser.add_argument("--intra-op-threads", type=int, default=settings.TF_INTRA_OP_THREADS,
+                        help="TensorFlow intra-op threads per worker (0 = CPUs // workers)")
+    parser.add_argument("--inter-op-threads", type=int, default=settings.TF_INTER_OP_THREADS,
+                        help="TensorFlow inter-op threads per worker")
+    parser.add_argument("--stats-interval", type=float, default=60, help="Seconds between stats reports (0 = off)")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    intra_threads = args.intra_op_threads or default_threads(workers)
+    inter_threads = max(1, args.inter_op_threads)
+    if not settings.TFLITE_NUM_THREADS:
+        settings.TFLITE_NUM_THREADS = intra_threads
+
+    start = time.time()
+    if settings.MODEL_BACKEND != "mock":
+        import tensorflow  # noqa: F401
+    import fastapi  # noqa: F401
+    import uvicorn  # noqa: F401
+    import app.services.tf_inference  # noqa: F401
+    preloaded = preload_shared_models()
+    print(f"[OK] Parent ready in {time.time() - start:.1f}s; shared models: {preloaded or 'none'}; "
+          f"{workers} workers x {intra_threads} intra-op / {inter_threads} inter-op threads")
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    Supervisor(sock, workers, intra_threads, inter_threads, args).run()
+
+
+if __name__ == "__main__":
+    main()
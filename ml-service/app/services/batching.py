@@ -0,0 +1,171 @@
+"""
+Dynamic micro-batching for offline disease detection
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Sequence
+
+import numpy as np
+
+
+class _BatchItem:
+    """A single queued inference request"""
+
+    __slots__ = ("image_array", "top_k", "future", "enqueued_at")
+
+    def __init__(self, image_array: np.ndarray, top_k: int):
+        self.image_array = image_array
+        self.top_k = top_k
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def shape(self):
+        return self.image_array.shape[1:]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests for one crop model into batched calls
+
+    Requests are queued and a single worker thread drains them, waiting at
+    most `max_wait_ms` after the oldest request for more work to arrive.
+    Only tensors with identical spatial shapes are stacked together.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[np.ndarray, Sequence[int]], List[List[Dict]]],
+        name: str = "model",
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize batcher for one model
+
+        Args:
+            predict_batch: Function running a stacked batch with per-image top_k,
+                e.g. TFDiseaseDetector.predict_batch
+            name: Name used for the worker thread
+            max_batch_size: Maximum number of images per model call
+            max_wait_ms: Maximum time to hold the oldest request for batching
+        """
+        self.predict_batch = predict_batch
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[_BatchItem]" = queue.Queue()
+        self._deferred: Deque[_BatchItem] = deque()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        self.batches_run = 0
+        self.images_processed = 0
+        self.max_batch_seen = 0
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name=f"batcher-{self.name}",
+                    daemon=True
+                )
+                self._worker.start()
+
+    def submit(self, image_array: np.ndarray, top_k: int = 3) -> Future:
+        """
+        Queue a preprocessed image for batched inference
+
+        Args:
+            image_array: Preprocessed image (1, height, width, 3)
+            top_k: Number of top predictions for this caller
+
+        Returns:
+            Future resolving to the caller's list of predictions
+        """
+        self._ensure_worker()
+        item = _BatchItem(image_array, top_k)
+        self._queue.put(item)
+        return item.future
+
+    def predict(self, image_array: np.ndarray, top_k: int = 3) -> List[Dict]:
+        """Blocking helper around submit()"""
+        return self.submit(image_array, top_k).result()
+
+    def _next_item(self) -> _BatchItem:
+        if self._deferred:
+            return self._deferred.popleft()
+        return self._queue.get()
+
+    def _collect(self) -> List[_BatchItem]:
+        """Gather up to max_batch_size shape-compatible requests"""
+        first = self._next_item()
+        batch = [first]
+
+        still_deferred: Deque[_BatchItem] = deque()
+        while self._deferred and len(batch) < self.max_batch_size:
+            item = self._deferred.popleft()
+            if item.shape == first.shape:
+                batch.append(item)
+            else:
+                still_deferred.append(item)
+        self._deferred.extendleft(reversed(still_deferred))
+
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if item.shape == first.shape:
+                batch.append(item)
+            else:
+                self._deferred.append(item)
+
+        return batch
+
+    def _run(self):
+        """Worker loop: collect a batch, run it, resolve futures"""
+        while True:
+            batch = self._collect()
+            batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                images = np.concatenate([item.image_array for item in batch], axis=0)
+                results = self.predict_batch(images, [item.top_k for item in batch])
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.images_processed += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+            for item, result in zip(batch, results):
+                item.future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """Get batching statistics"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches_run": self.batches_run,
+            "images_processed": self.images_processed,
+            "avg_batch_size": round(self.images_processed / self.batches_run, 2) if self.batches_run else 0,
+            "max_batch_seen": self.max_batch_seen,
+            "queued": self._queue.qsize() + len(self._deferred)
+        }
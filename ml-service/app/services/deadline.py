@@ -0,0 +1,142 @@
+"""
+Request deadlines and client-disconnect cancellation
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Optional
+
+# Remaining time budget sent by callers, in milliseconds (relative, so clock skew does not matter)
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+
+
+class RequestCancelled(Exception):
+    """Raised at a stage boundary when the request's deadline passed or its client went away"""
+
+    def __init__(self, token: "CancelToken", reason: str, stage: str):
+        super().__init__(
+            f"Request {'deadline exceeded' if reason == 'deadline' else 'abandoned by client'} before {stage}"
+        )
+        self.token = token
+        self.reason = reason
+        self.stage = stage
+
+
+class CancelToken:
+    """
+    Deadline and cancellation state of one request
+
+    Set from the event loop (disconnect watcher) and checked from worker
+    threads at stage boundaries, so expired or abandoned work is skipped
+    instead of finished for nobody.
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Initialize token
+
+        Args:
+            deadline: time.monotonic() after which the result is useless (None = no deadline)
+        """
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_timeout(cls, timeout_s: Optional[float]) -> "CancelToken":
+        """Token expiring `timeout_s` seconds from now (None or <= 0 = no deadline)"""
+        if timeout_s is None or timeout_s <= 0:
+            return cls()
+        return cls(time.monotonic() + timeout_s)
+
+    def cancel(self):
+        """Mark the request as abandoned by its client"""
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (None if there is none)"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    @property
+    def reason(self) -> Optional[str]:
+        """"disconnected", "deadline" or None while the work is still wanted"""
+        if self._cancelled.is_set():
+            return "disconnected"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "deadline"
+        return None
+
+    def check(self, stage: str):
+        """Raise RequestCancelled if the work about to start is no longer wanted"""
+        reason = self.reason
+        if reason is not None:
+            raise RequestCancelled(self, reason, stage)
+
+
+def wait_future(
+    future: Future,
+    cancel: Optional[CancelToken],
+    stage: str,
+    withdraw: bool = True,
+    poll_s: float = 0.01
+) -> Any:
+    """
+    Wait for a future from a worker thread, giving up once the token fires
+
+    Args:
+        future: Future to wait for
+        cancel: Request token (None = wait without limit)
+        stage: Stage reported if the wait is abandoned
+        withdraw: Also cancel the future if it has not started; pass False
+                  for futures other requests wait on too
+        poll_s: Interval between token checks
+
+    Returns:
+        The future's result
+
+    Raises:
+        RequestCancelled: If the deadline passed or the client went away first
+    """
+    if cancel is None:
+        return future.result()
+
+    while True:
+        try:
+            return future.result(timeout=poll_s)
+        except FutureTimeoutError:
+            if cancel.reason is not None:
+                if withdraw:
+                    future.cancel()
+                cancel.check(stage)
+
+
+def parse_timeout_header(value: Optional[str]) -> Optional[float]:
+    """Time budget in seconds from the X-Request-Timeout-Ms header (None if absent or invalid)"""
+    if not value:
+        return None
+    try:
+        timeout_ms = float(value)
+    except ValueError:
+        return None
+    return timeout_ms / 1000 if timeout_ms > 0 else None
+
+
+async def watch_disconnect(request, token: CancelToken, interval_s: float = 0.05):
+    """
+    Cancel the token when the client disconnects
+
+    Run as a task for the lifetime of the request and cancel it when the
+    response is ready.
+
+    Args:
+        request: Starlette Request whose body has already been read
+        token: Token to cancel
+        interval_s: Polling interval
+    """
+    while token.reason is None:
+        if await request.is_disconnected():
+            token.cancel()
+            return
+        await asyncio.sleep(interval_s)
@@ -0,0 +1,124 @@
+"""
+Bounded worker pool for running blocking inference off the event loop
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class QueueFullError(Exception):
+    """Raised when the inference admission queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Runs synchronous inference calls in a dedicated thread pool
+
+    At most `max_workers` calls run at once and at most `max_queue_size`
+    more may wait for a worker. Anything beyond that is rejected
+    immediately with QueueFullError so callers can shed load.
+    """
+
+    def __init__(self, max_workers: int = 8, max_queue_size: int = 32, retry_after: int = 1):
+        """
+        Initialize executor
+
+        Args:
+            max_workers: Number of inference worker threads
+            max_queue_size: Maximum number of calls waiting for a worker
+            retry_after: Seconds suggested to rejected clients
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+        self.retry_after = retry_after
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._active = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable in the worker pool
+
+        Args:
+            fn: Synchronous function to execute
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Return value of fn
+
+        Raises:
+            QueueFullError: If the admission queue is full
+        """
+        with self._lock:
+            if self._admitted >= self.max_workers + self.max_queue_size:
+                self.rejected += 1
+                raise QueueFullError(self.retry_after)
+            self._admitted += 1
+
+        submitted_at = time.monotonic()
+
+        def task():
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                self._active += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+                self._last_wait = wait
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self.completed += 1
+
+        def release(_future):
+            with self._lock:
+                self._admitted -= 1
+
+        future = self._pool.submit(task)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of admitted calls waiting for a worker"""
+        with self._lock:
+            return max(0, self._admitted - self._active)
+
+    def get_stats(self) -> Dict:
+        """Get executor statistics"""
+        with self._lock:
+            started = self.completed + self._active
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "active": self._active,
+                "queue_depth": max(0, self._admitted - self._active),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self._total_wait / started * 1000, 2) if started else 0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+                "last_wait_ms": round(self._last_wait * 1000, 2)
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release worker threads"""
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,191 @@
+"""
+Rate-limit-aware scheduling for Gemini API calls
+"""
+import asyncio
+import math
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class GeminiQueueFullError(Exception):
+    """Raised when the Gemini wait queue is full or the deadline cannot be met"""
+
+    def __init__(self, retry_after: int, reason: str = "queue_full"):
+        super().__init__(f"Gemini request queue is full ({reason})")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class GeminiDeadlineError(Exception):
+    """Raised when a Gemini request misses its deadline while waiting or running"""
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `rate_per_minute`
+
+    A capacity of 1 spaces calls evenly; a larger capacity allows short
+    bursts while keeping the same long-run rate.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: int = 1):
+        self.rate = max(rate_per_minute, 0.001) / 60.0
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one will be
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def drain(self):
+        """Empty the bucket, e.g. after the API itself answered 429"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class GeminiScheduler:
+    """
+    Admits Gemini calls at the configured quota, in arrival order
+
+    Calls beyond the current token supply wait in a bounded FIFO queue. A
+    call is rejected immediately (GeminiQueueFullError) when the queue is
+    full or when its expected start time is already past its deadline, and
+    fails with GeminiDeadlineError if the deadline passes while waiting or
+    during the API call itself.
+    """
+
+    def __init__(self, rate_per_minute: float = 15, burst: int = 1, max_queue: int = 10):
+        """
+        Initialize scheduler
+
+        Args:
+            rate_per_minute: Sustained requests per minute (the API quota)
+            burst: Token bucket capacity
+            max_queue: Maximum calls waiting for a token (at least 1)
+        """
+        self.bucket = TokenBucket(rate_per_minute, burst)
+        self.max_queue = max(1, max_queue)
+
+        self._turn: Optional[asyncio.Lock] = None
+        self._waiting = 0
+
+        self.dispatched = 0
+        self.rejected = 0
+        self.deadline_exceeded = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _expected_wait(self, position: int) -> float:
+        """Seconds until a caller at `position` in the queue gets a token"""
+        missing = position + 1 - self.bucket.tokens
+        return max(0.0, missing / self.bucket.rate)
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._expected_wait(self._waiting)))
+
+    async def _acquire(self, deadline: float):
+        """Wait for a token in FIFO order, or raise before the deadline is missed"""
+        if self._turn is None:
+            self._turn = asyncio.Lock()
+
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise GeminiQueueFullError(self._retry_after())
+        if time.monotonic() + self._expected_wait(self._waiting) > deadline:
+            self.rejected += 1
+            raise GeminiQueueFullError(self._retry_after(), reason="deadline_unreachable")
+
+        self._waiting += 1
+        has_turn = False
+        try:
+            try:
+                await asyncio.wait_for(self._turn.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.deadline_exceeded += 1
+                raise GeminiDeadlineError("Deadline exceeded while queued for Gemini")
+            has_turn = True
+
+            while True:
+                wait = self.bucket.try_acquire()
+                if wait == 0:
+                    return
+                if time.monotonic() + wait > deadline:
+                    self.deadline_exceeded += 1
+                    raise GeminiDeadlineError("Deadline exceeded while queued for Gemini")
+                await asyncio.sleep(wait)
+        finally:
+            self._waiting -= 1
+            if has_turn:
+                self._turn.release()
+
+    async def run(self, call: Callable[[], Awaitable[T]], deadline: float) -> T:
+        """
+        Run an async Gemini call once a rate-limit token is available
+
+        Args:
+            call: Zero-argument coroutine function making the API call
+            deadline: time.monotonic() by which the call must complete
+
+        Returns:
+            The call's result
+        """
+        enqueued = time.monotonic()
+        await self._acquire(deadline)
+
+        waited = time.monotonic() - enqueued
+        self.dispatched += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+        try:
+            return await asyncio.wait_for(call(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            raise GeminiDeadlineError("Deadline exceeded waiting for Gemini response")
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls currently waiting for a token"""
+        return self._waiting
+
+    def get_stats(self) -> Dict:
+        """Get scheduler statistics"""
+        return {
+            "rate_per_minute": round(self.bucket.rate * 60, 2),
+            "burst": self.bucket.capacity,
+            "max_queue": self.max_queue,
+            "queued": self._waiting,
+            "tokens": round(self.bucket.tokens, 2),
+            "dispatched": self.dispatched,
+            "rejected": self.rejected,
+            "deadline_exceeded": self.deadline_exceeded,
+            "avg_wait_ms": round(self._total_wait / self.dispatched * 1000, 1) if self.dispatched else 0,
+            "max_wait_ms": round(self._max_wait * 1000, 1)
+        }
@@ -2,45 +2,43 @@
 Google Gemini API integration for online disease detection
 """
 import os
+import time
+import asyncio
 import base64
-from typing import Dict
-import google.generativeai as genai
-from PIL import Image
+from typing import Dict, Optional, Tuple
+from PIL import Image, ImageOps
 import io
 
 
 class GeminiDiseaseDetector:
     """Uses Google Gemini for plant disease detection when online"""
     
-    def __init__(self):
-        """Initialize Gemini API"""
+    def __init__(self, upload_max_edge: int = 1024, upload_quality: int = 85):
+        """
+        Initialize Gemini API
+        
+        Args:
+            upload_max_edge: Longest image edge sent to Gemini (0 = send the original bytes)
+            upload_quality: JPEG quality of the re-encoded upload
+        """
+        self.upload_max_edge = upload_max_edge
+        self.upload_quality = upload_quality
+        
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
+        # Imported here: the SDK (with grpc/protobuf) adds noticeably to cold
+        # start and is only needed once online mode is used
+        import google.generativeai as genai
+        
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-2.0-flash')
     
-    def detect_disease(self, image_base64: str, crop_hint: str = None) -> Dict:
-        """
-        Detect plant disease using Gemini Vision API
-        
-        Args:
-            image_base64: Base64 encoded image
-            crop_hint: Optional crop hint for better accuracy
-            
-        Returns:
-            Dictionary with disease detection results
-        """
-        try:
-            if ',' in image_base64:
-                image_base64 = image_base64.split(',')[1]
-            
-            image_bytes = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            if crop_hint and crop_hint.lower() != "other":
-                prompt = f"""Analyze this {crop_hint} plant image and identify any diseases.
+    def _build_prompt(self, crop_hint: Optional[str]) -> str:
+        """Analysis prompt, specialised to the crop when a hint is given"""
+        if crop_hint and crop_hint.lower() != "other":
+            return f"""Analyze this {crop_hint} plant image and identify any diseases.
 
 Provide a detailed response in the following format:
 
@@ -64,8 +62,8 @@ Provide a detailed response in the following format:
 - [List preventive actions]
 
 If the plant appears healthy, state that clearly and provide general care tips."""
-            else:
-                prompt = """Identify this plant and analyze it for any diseases.
+        
+        return """Identify this plant and analyze it for any diseases.
 
 Provide a detailed response in the following format:
 
@@ -89,25 +87,136 @@ Provide a detailed response in the following format:
 - [List preventive actions]
 
 If the plant appears healthy, state that clearly and provide general care tips."""
+    
+    def _prepare_image(self, image_base64: Optional[str], image_bytes: Optional[bytes]) -> Tuple[Dict, Dict]:
+        """
+        Build the image part of the request from the uploaded bytes
+        
+        Unless disabled, the image is downscaled to upload_max_edge, rotated
+        according to its EXIF orientation, and re-encoded as a JPEG without
+        EXIF/GPS or ICC metadata. Multi-megabyte phone photos shrink to a
+        small fraction of their size at a resolution still ample for analysis.
+        
+        Args:
+            image_base64: Base64 encoded image (ignored when image_bytes is given)
+            image_bytes: Raw encoded image bytes
+            
+        Returns:
+            Tuple of (inline blob {"mime_type", "data"} for generate_content,
+            upload info {"original_bytes", "sent_bytes", "width", "height", "prepare_ms"})
+        """
+        start = time.time()
+        
+        if image_bytes is None:
+            if ',' in image_base64:
+                image_base64 = image_base64.split(',')[1]
             
-            response = self.model.generate_content([prompt, image])
+            image_bytes = base64.b64decode(image_base64)
+        
+        image = Image.open(io.BytesIO(image_bytes))
+        
+        if not self.upload_max_edge:
+            data = image_bytes
+            mime_type = Image.MIME.get(image.format, "image/jpeg")
+        else:
+            max_size = (self.upload_max_edge, self.upload_max_edge)
+            if image.format == "JPEG":
+                image.draft("RGB", max_size)
+            image = ImageOps.exif_transpose(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+            
+            buffered = io.BytesIO()
+            image.save(buffered, format="JPEG", quality=self.upload_quality, optimize=True)
+            data = buffered.getvalue()
+            mime_type = "image/jpeg"
+        
+        upload_info = {
+            "original_bytes": len(image_bytes),
+            "sent_bytes": len(data),
+            "width": image.width,
+            "height": image.height,
+            "prepare_ms": int((time.time() - start) * 1000)
+        }
+        return {"mime_type": mime_type, "data": data}, upload_info
+    
+    def _success(self, response) -> Dict:
+        return {
+            "success": True,
+            "analysis": response.text,
+            "model": "gemini-2.0-flash",
+            "mode": "online"
+        }
+    
+    def _error(self, e: Exception) -> Dict:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"[GEMINI ERROR] {error_details}")
+        return {
+            "success": False,
+            "error": f"Gemini API error: {str(e)}",
+            "mode": "online"
+        }
+    
+    def detect_disease(
+        self, 
+        image_base64: Optional[str], 
+        crop_hint: str = None,
+        image_bytes: Optional[bytes] = None
+    ) -> Dict:
+        """
+        Detect plant disease using Gemini Vision API
+        
+        Args:
+            image_base64: Base64 encoded image (ignored when image_bytes is given)
+            crop_hint: Optional crop hint for better accuracy
+            image_bytes: Raw encoded image bytes from a binary upload
+            
+        Returns:
+            Dictionary with disease detection results
+        """
+        try:
+            image_part, upload_info = self._prepare_image(image_base64, image_bytes)
+            
+            upload_start = time.time()
+            response = self.model.generate_content([self._build_prompt(crop_hint), image_part])
+            upload_info["request_ms"] = int((time.time() - upload_start) * 1000)
+            
+            return dict(self._success(response), upload=upload_info)
+        except Exception as e:
+            return self._error(e)
+    
+    async def detect_disease_async(
+        self, 
+        image_base64: Optional[str], 
+        crop_hint: str = None,
+        image_bytes: Optional[bytes] = None
+    ) -> Dict:
+        """
+        Async variant of detect_disease for use on the event loop
+        
+        Image preparation runs in a worker thread and the API call uses the
+        client's native async transport, so no thread is held while waiting.
+        
+        Args:
+            image_base64: Base64 encoded image (ignored when image_bytes is given)
+            crop_hint: Optional crop hint for better accuracy
+            image_bytes: Raw encoded image bytes from a binary upload
+            
+        Returns:
+            Dictionary with disease detection results
+        """
+        try:
+            image_part, upload_info = await asyncio.to_thread(self._prepare_image, image_base64, image_bytes)
             
-            return {
-                "success": True,
-                "analysis": response.text,
-                "model": "gemini-2.0-flash",
-                "mode": "online"
-            }
+            upload_start = time.time()
+            response = await self.model.generate_content_async([self._build_prompt(crop_hint), image_part])
+            upload_info["request_ms"] = int((time.time() - upload_start) * 1000)
             
+            return dict(self._success(response), upload=upload_info)
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"[GEMINI ERROR] {error_details}")
-            return {
-                "success": False,
-                "error": f"Gemini API error: {str(e)}",
-                "mode": "online"
-            }
+            return self._error(e)
     
     def check_availability(self) -> bool:
         """Check if Gemini API is available"""
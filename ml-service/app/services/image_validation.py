@@ -0,0 +1,134 @@
+"""
+Header-only validation of uploaded images
+"""
+import io
+from typing import Dict, Iterable
+
+from PIL import Image, UnidentifiedImageError
+
+# Pillow format IDs whose end-of-image marker is checked to catch truncated uploads
+END_MARKERS = {
+    "JPEG": b"\xff\xd9",
+    "MPO": b"\xff\xd9",
+    "PNG": b"IEND",
+}
+
+
+class ImageValidationError(ValueError):
+    """Raised when an upload is rejected before any pixel data is decoded"""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+    @property
+    def error_type(self) -> str:
+        """"image_too_large" for size limits (413), "invalid_image" otherwise (422)"""
+        return "image_too_large" if self.reason in ("bytes", "pixels", "dimensions") else "invalid_image"
+
+
+class ImageValidator:
+    """
+    Rejects oversized, malformed or unsupported images from their header alone
+
+    PIL's Image.open only parses the container header (JPEG markers up to the
+    scan, PNG chunks up to IDAT, ...), so format and dimensions are known in
+    microseconds without allocating the pixel buffer. A 100 KB PNG that
+    inflates to gigabytes (a decompression bomb) is refused here instead of
+    taking a worker's memory down during decode.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_pixels: int,
+        max_dimension: int,
+        min_dimension: int = 1,
+        formats: Iterable[str] = ("JPEG", "PNG", "WEBP")
+    ):
+        """
+        Initialize validator
+
+        Args:
+            max_bytes: Largest encoded image accepted (0 = no limit)
+            max_pixels: Largest width * height accepted (0 = no limit)
+            max_dimension: Largest width or height accepted (0 = no limit)
+            min_dimension: Smallest width or height accepted
+            formats: Pillow format IDs accepted; other formats are never parsed.
+                     "JPEG" also admits multi-picture phone JPEGs (reported as MPO)
+        """
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.max_dimension = max_dimension
+        self.min_dimension = max(1, min_dimension)
+        # Register every plugin so any format ID resolves; IDs Pillow cannot open are ignored
+        Image.init()
+        self.formats = tuple(f.strip().upper() for f in formats if f.strip().upper() in Image.OPEN)
+
+    def check_size(self, num_bytes: int):
+        """Reject an encoded image larger than max_bytes"""
+        if self.max_bytes and num_bytes > self.max_bytes:
+            raise ImageValidationError(
+                f"Image is {num_bytes} bytes; the limit is {self.max_bytes} bytes",
+                "bytes"
+            )
+
+    def check_base64(self, base64_string: str):
+        """Reject a base64 payload whose decoded size would exceed max_bytes, without decoding it"""
+        payload = base64_string.split(',', 1)[1] if ',' in base64_string else base64_string
+        self.check_size(len(payload) * 3 // 4)
+
+    def validate(self, image_bytes: bytes) -> Dict:
+        """
+        Check size, format, dimensions and completeness of an encoded image
+
+        Args:
+            image_bytes: Encoded image bytes
+
+        Returns:
+            Header info {"format", "width", "height", "pixels"}
+
+        Raises:
+            ImageValidationError: If the image must not be decoded
+        """
+        self.check_size(len(image_bytes))
+        if not image_bytes:
+            raise ImageValidationError("Image is empty", "empty")
+
+        try:
+            with Image.open(io.BytesIO(image_bytes), formats=self.formats or None) as image:
+                image_format = image.format
+                width, height = image.size
+        except Image.DecompressionBombError as e:
+            raise ImageValidationError(str(e), "pixels")
+        except UnidentifiedImageError:
+            raise ImageValidationError(
+                f"Not a supported image. Accepted formats: {', '.join(self.formats)}",
+                "format"
+            )
+        except Exception as e:
+            raise ImageValidationError(f"Corrupt image header: {str(e)}", "corrupt")
+
+        if self.max_dimension and max(width, height) > self.max_dimension:
+            raise ImageValidationError(
+                f"Image is {width}x{height}; the largest side may be {self.max_dimension} pixels",
+                "dimensions"
+            )
+        if self.max_pixels and width * height > self.max_pixels:
+            raise ImageValidationError(
+                f"Image has {width * height} pixels; the limit is {self.max_pixels}",
+                "pixels"
+            )
+        if min(width, height) < self.min_dimension:
+            raise ImageValidationError(
+                f"Image is {width}x{height}; each side must be at least {self.min_dimension} pixels",
+                "too_small"
+            )
+
+        # The marker can also occur earlier (e.g. an EXIF thumbnail), so this only
+        # catches uploads cut off before any end marker; decode still checks the rest
+        end_marker = END_MARKERS.get(image_format)
+        if end_marker is not None and image_bytes.rfind(end_marker) == -1:
+            raise ImageValidationError("Image is truncated", "truncated")
+
+        return {"format": image_format, "width": width, "height": height, "pixels": width * height}
@@ -7,10 +7,26 @@ import os
 from typing import Dict, List
 import torch
 
+from app.config import settings
 from app.services.preprocessing import ImagePreprocessor
+from app.services.self_test import SelfTestMonitor
 from app.models.disease_detector import DiseaseDetectionModel, MockDiseaseDetectionModel
 
 
+def configure_torch_threads(num_threads: int):
+    """
+    Set PyTorch's intra-op thread count for the whole process
+    
+    torch.set_num_threads is process-global, so it is called once at service
+    startup rather than by each model instance.
+    
+    Args:
+        num_threads: Intra-op threads (0 = keep the PyTorch default)
+    """
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+
+
 class DiseaseDetectionService:
     """Service for disease detection inference"""
     
@@ -21,14 +37,26 @@ class DiseaseDetectionService:
         Args:
             use_mock: Whether to use mock model (for development)
         """
-        self.preprocessor = ImagePreprocessor(target_size=(224, 224))
         self.use_mock = use_mock
         
+        if not use_mock:
+            configure_torch_threads(settings.TORCH_NUM_THREADS)
+        
         if use_mock:
             self.model = MockDiseaseDetectionModel()
         else:
             model_path = os.getenv("MODEL_PATH", None)
-            self.model = DiseaseDetectionModel(num_classes=25, model_path=model_path)
+            self.model = DiseaseDetectionModel(
+                num_classes=25,
+                model_path=model_path,
+                engine=settings.TORCH_ENGINE,
+                channels_last=settings.TORCH_CHANNELS_LAST
+            )
+        
+        self.preprocessor = ImagePreprocessor(
+            target_size=(224, 224),
+            channels_last=getattr(self.model, "channels_last", False)
+        )
         
         self.model.load_model()
         
@@ -36,6 +64,13 @@ class DiseaseDetectionService:
         
         self.model_version = "v1.0.0"
         
+        self._dummy_image = self._create_dummy_image()
+        self.self_test = SelfTestMonitor(
+            self._run_self_test,
+            interval_s=settings.SELF_TEST_INTERVAL_S
+        )
+        self.self_test.start()
+        
     def _load_treatments(self) -> Dict:
         """Load disease treatment information"""
         treatments_path = os.path.join(
@@ -121,10 +156,13 @@ class DiseaseDetectionService:
         }
     
     def health_check(self) -> Dict:
-        """Health check for the service"""
+        """Health check for the service (cached result of the background self-test)"""
+        return self.self_test.get_status()
+    
+    def _run_self_test(self) -> Dict:
+        """Run one inference on a dummy image"""
         try:
-            dummy_image = self._create_dummy_image()
-            result = self.detect_disease(dummy_image, top_k=1)
+            result = self.detect_disease(self._dummy_image, top_k=1)
             
             return {
                 "status": "healthy" if result["success"] else "unhealthy",
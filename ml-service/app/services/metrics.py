@@ -0,0 +1,260 @@
+"""
+In-process metrics with Prometheus text exposition
+
+Counters, gauges and histograms are kept in memory and rendered on demand by
+the /metrics endpoint. Label values must come from bounded sets (use
+crop_label() for user-supplied crop names) to keep series counts small.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(2 ** i * 1024 for i in range(4, 15))  # 16 KB .. 16 MB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class holding one value per label combination"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Increment for the duration of the block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values (seconds for latencies)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state["counts"]), state["sum"]) for key, state in self._values.items())
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+def crop_label(crop: Optional[str], known: Iterable[str]) -> str:
+    """Map a user-supplied crop name onto a bounded label value"""
+    crop = (crop or "").lower()
+    return crop if crop in known else "other"
+
+
+registry = MetricsRegistry()
+
+STAGE_LATENCY = registry.histogram(
+    "farmly_ml_stage_duration_seconds",
+    "Time spent per detection stage (decode, preprocess, inference, treatment, total)",
+    ("crop", "mode", "stage")
+)
+REQUESTS = registry.counter(
+    "farmly_ml_requests_total",
+    "Detection requests by outcome",
+    ("crop", "mode", "outcome")
+)
+IN_FLIGHT = registry.gauge(
+    "farmly_ml_requests_in_flight",
+    "Detection requests currently being handled",
+    ("mode",)
+)
+GEMINI_LATENCY = registry.histogram(
+    "farmly_ml_gemini_request_duration_seconds",
+    "Latency of Gemini API calls",
+    ("outcome",)
+)
+GEMINI_UPLOAD_BYTES = registry.histogram(
+    "farmly_ml_gemini_upload_bytes",
+    "Image bytes sent per Gemini request",
+    buckets=SIZE_BUCKETS
+)
+GEMINI_UPLOAD_BYTES_SAVED = registry.counter(
+    "farmly_ml_gemini_upload_bytes_saved_total",
+    "Image bytes not uploaded thanks to pre-upload downscaling"
+)
+GEMINI_UPLOAD_PREPARE = registry.histogram(
+    "farmly_ml_gemini_upload_prepare_seconds",
+    "Time spent downscaling and re-encoding images before upload"
+)
+GEMINI_REQUEST_TIME = registry.histogram(
+    "farmly_ml_gemini_upload_request_seconds",
+    "Round trip of the Gemini request carrying the image (upload and analysis)"
+)
+GEMINI_SHED = registry.counter(
+    "farmly_ml_gemini_shed_total",
+    "Gemini requests rejected by the scheduler (queue_full, deadline_unreachable, deadline_exceeded)",
+    ("reason",)
+)
+IMAGES_REJECTED = registry.counter(
+    "farmly_ml_images_rejected_total",
+    "Images rejected from their header before decoding (bytes, pixels, dimensions, format, corrupt, truncated, ...)",
+    ("mode", "reason")
+)
+REQUESTS_SHED = registry.counter(
+    "farmly_ml_requests_shed_total",
+    "Detection work skipped because the deadline passed or the client disconnected",
+    ("mode", "stage", "reason")
+)
+GEMINI_QUEUE_DEPTH = registry.gauge(
+    "farmly_ml_gemini_queue_depth",
+    "Gemini requests waiting for a rate-limit token"
+)
+ONLINE_CACHE_LOOKUPS = registry.counter(
+    "farmly_ml_online_cache_lookups_total",
+    "Perceptual-hash cache lookups for online analyses",
+    ("result",)
+)
+INFERENCE_QUEUE_DEPTH = registry.gauge(
+    "farmly_ml_inference_queue_depth",
+    "Admitted inference calls waiting for a worker"
+)
+MODELS_LOADED = registry.gauge(
+    "farmly_ml_models_loaded",
+    "Crop models currently loaded in memory"
+)
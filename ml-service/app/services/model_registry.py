@@ -0,0 +1,285 @@
+"""
+Per-crop model registry with lazy loading, memory budget and LRU eviction
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+def get_rss_bytes() -> int:
+    """Current resident set size of this process (0 if unavailable)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ModelLoadError(Exception):
+    """Raised when a crop model cannot be loaded"""
+
+
+class ModelRegistry:
+    """
+    Owns the loaded crop models
+
+    In eager mode every configured crop is loaded up front. In lazy mode
+    only the pinned crops are preloaded and the rest load on first use.
+    Whenever the total estimated model memory exceeds the budget, the least
+    recently used models that are neither pinned nor in use are unloaded.
+    """
+
+    def __init__(
+        self,
+        crops: List[str],
+        factory: Callable[[str], object],
+        lazy: bool = False,
+        memory_budget_mb: float = 0,
+        pinned: Optional[List[str]] = None,
+        retry_after_s: float = 60
+    ):
+        """
+        Initialize registry
+
+        Args:
+            crops: All configured crop names
+            factory: Creates an unloaded detector for a crop
+            lazy: Load models on first use instead of at startup
+            memory_budget_mb: Total model memory allowed (0 = unlimited)
+            pinned: Crops to preload and never evict
+            retry_after_s: Time after a failed load before the crop may be loaded again
+        """
+        self.crops = list(crops)
+        self.factory = factory
+        self.lazy = lazy
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.pinned = [c for c in (pinned or []) if c in self.crops]
+        self.retry_after_s = max(0.0, retry_after_s)
+
+        self.models: Dict[str, object] = {}
+        self.failed: Dict[str, str] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load_locks = {crop: threading.Lock() for crop in self.crops}
+        # Crops being loaded, and those whose load overlapped another one
+        self._loading: List[str] = []
+        self._overlapped = set()
+
+        self.loads = 0
+        self.evictions = 0
+
+    def preload(self, max_workers: int = 0) -> Dict[str, Dict]:
+        """
+        Load the startup set of models (all crops, or the pinned ones when lazy)
+        
+        Models load concurrently. Much of a SavedModel restore is file I/O and
+        TensorFlow C++ code, so loads overlap on multi-core hosts; on a single
+        core, max_workers=1 avoids the contention. With a memory budget they
+        load one at a time, so each model's RSS growth is measured on its own
+        before the budget is enforced.
+        
+        Args:
+            max_workers: Concurrent loads (0 = one per crop; ignored with a memory budget)
+            
+        Returns:
+            Per-crop {"start", "end", "error"} wall-clock timings
+        """
+        crops = self.pinned if self.lazy else self.crops
+        if not crops:
+            return {}
+        
+        def load(crop: str) -> Dict:
+            start = time.time()
+            try:
+                self._load(crop)
+                print(f"[OK] Loaded {crop} model")
+                error = None
+            except ModelLoadError as e:
+                print(f"[FAIL] Failed to load {crop} model: {str(e)}")
+                error = str(e)
+            return {"start": start, "end": time.time(), "error": error}
+        
+        workers = 1 if self.memory_budget_bytes else max(1, min(max_workers or len(crops), len(crops)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model-load") as pool:
+            return dict(zip(crops, pool.map(load, crops)))
+
+    def _load_error(self, crop: str) -> Optional[str]:
+        """Error of the crop's last failed load, or None once retry_after_s has passed"""
+        with self._lock:
+            if crop not in self.failed:
+                return None
+            if time.monotonic() - self._failed_at[crop] < self.retry_after_s:
+                return self.failed[crop]
+            del self.failed[crop]
+            del self._failed_at[crop]
+            return None
+
+    def is_available(self, crop: str) -> bool:
+        """Whether a crop can be served (loaded, or loadable on demand)"""
+        if crop in self.models:
+            return True
+        return self.lazy and crop in self.crops and self._load_error(crop) is None
+
+    def available_crops(self) -> List[str]:
+        """Crops that can be served"""
+        return [crop for crop in self.crops if self.is_available(crop)]
+
+    @contextmanager
+    def acquire(self, crop: str, load: bool = True, touch: bool = True) -> Iterator[Optional[object]]:
+        """
+        Get a loaded detector, loading it if needed, and mark it in use
+
+        Args:
+            crop: Crop name
+            load: Load the model if it is not loaded; otherwise yield None
+            touch: Count the call as use for LRU eviction. Internal callers
+                   such as the self-test pass False so idle models stay idle
+
+        Yields:
+            Loaded detector (or None, see load); it will not be evicted until the block exits
+        """
+        while True:
+            with self._lock:
+                detector = self.models.get(crop)
+                if detector is not None:
+                    self._in_use[crop] = self._in_use.get(crop, 0) + 1
+                    break
+            if not load:
+                yield None
+                return
+            self._load(crop)
+
+        try:
+            yield detector
+        finally:
+            with self._lock:
+                self._in_use[crop] -= 1
+                if touch and crop in self._stats:
+                    self._stats[crop]["last_used"] = time.monotonic()
+
+    def _load(self, crop: str):
+        """
+        Load a crop model once, then enforce the memory budget
+
+        A model's memory is the process RSS growth during its load. If another
+        load ran at the same time, that growth includes the other model's
+        allocations, so the detector's own variable_bytes is used instead.
+        """
+        if crop not in self._load_locks:
+            raise ModelLoadError(f"Unknown crop: {crop}")
+
+        with self._load_locks[crop]:
+            if crop in self.models:
+                return
+            error = self._load_error(crop)
+            if error is not None:
+                raise ModelLoadError(error)
+
+            with self._lock:
+                self._loading.append(crop)
+                if len(self._loading) > 1:
+                    self._overlapped.update(self._loading)
+                rss_before = get_rss_bytes()
+
+            start = time.time()
+            try:
+                detector = self.factory(crop)
+                detector.load_model()
+            except Exception as e:
+                with self._lock:
+                    self.failed[crop] = str(e)
+                    self._failed_at[crop] = time.monotonic()
+                raise ModelLoadError(str(e)) from e
+            finally:
+                with self._lock:
+                    rss_delta = max(0, get_rss_bytes() - rss_before)
+                    self._loading.remove(crop)
+                    overlapped = crop in self._overlapped
+                    self._overlapped.discard(crop)
+
+            load_time = time.time() - start
+            variable_bytes = getattr(detector, "variable_bytes", 0) or 0
+            if overlapped and variable_bytes:
+                memory_bytes, memory_source = variable_bytes, "variables"
+            else:
+                memory_bytes, memory_source = max(rss_delta, variable_bytes), "rss"
+
+            with self._lock:
+                self.models[crop] = detector
+                self._stats[crop] = {
+                    "memory_bytes": memory_bytes,
+                    "memory_source": memory_source,
+                    "load_time_ms": int(load_time * 1000),
+                    "loaded_at": time.time(),
+                    "last_used": time.monotonic()
+                }
+                self.loads += 1
+                self._evict_over_budget(keep=crop)
+
+    def _evict_over_budget(self, keep: str):
+        """Unload idle LRU models until within budget (caller holds the lock)"""
+        if not self.memory_budget_bytes:
+            return
+
+        candidates = sorted(
+            (c for c in self.models if c != keep and c not in self.pinned and not self._in_use.get(c)),
+            key=lambda c: self._stats[c]["last_used"]
+        )
+        for crop in candidates:
+            if self.memory_bytes() <= self.memory_budget_bytes:
+                break
+            detector = self.models.pop(crop)
+            self._stats.pop(crop, None)
+            if hasattr(detector, "unload"):
+                detector.unload()
+            self.evictions += 1
+            print(f"[OK] Evicted {crop} model (memory budget)")
+
+    def memory_bytes(self) -> int:
+        """Total estimated memory of loaded models"""
+        return sum(stats["memory_bytes"] for stats in self._stats.values())
+
+    def get_models_info(self) -> Dict[str, Dict]:
+        """Per-crop model info including memory size and load time"""
+        info = {}
+        now = time.monotonic()
+        with self._lock:
+            for crop in self.crops:
+                detector = self.models.get(crop)
+                stats = self._stats.get(crop)
+                if detector is not None:
+                    entry = detector.get_model_info()
+                else:
+                    entry = {"model_loaded": False}
+                entry.update({
+                    "pinned": crop in self.pinned,
+                    "in_use": self._in_use.get(crop, 0),
+                    "memory_mb": round(stats["memory_bytes"] / (1024 * 1024), 2) if stats else None,
+                    "memory_source": stats["memory_source"] if stats else None,
+                    "load_time_ms": stats["load_time_ms"] if stats else None,
+                    "idle_seconds": round(now - stats["last_used"], 1) if stats else None
+                })
+                if crop in self.failed:
+                    entry["load_error"] = self.failed[crop]
+                    entry["retry_in_s"] = round(max(0.0, self._failed_at[crop] + self.retry_after_s - now), 1)
+                info[crop] = entry
+        return info
+
+    def get_stats(self) -> Dict:
+        """Get registry statistics"""
+        with self._lock:
+            return {
+                "loading": "lazy" if self.lazy else "eager",
+                "loaded": list(self.models.keys()),
+                "pinned": self.pinned,
+                "memory_mb": round(self.memory_bytes() / (1024 * 1024), 2),
+                "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 2) if self.memory_budget_bytes else None,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,248 @@
+"""
+Perceptual-hash cache for online (Gemini) analyses, persisted to disk
+"""
+import copy
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialized within the process
+    fcntl = None
+
+HASH_SIZE = 8
+
+
+def dhash(image_bytes: bytes, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of an encoded image
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale
+    thumbnail and each bit records whether a pixel is brighter than its
+    right-hand neighbour. Re-encodes, resizes, small crops and lighting
+    changes flip only a few of the 64 bits.
+
+    Args:
+        image_bytes: Encoded image bytes
+        hash_size: Bits per row (64-bit hash for 8)
+
+    Returns:
+        Hash as an int
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.format == "JPEG":
+        image.draft("L", (hash_size * 8, hash_size * 8))
+    image = ImageOps.exif_transpose(image).convert("L")
+    pixels = list(image.resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR).getdata())
+
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class PerceptualCache:
+    """
+    Near-duplicate cache for online results
+
+    Entries are keyed by (crop hint, dHash). A lookup returns the closest
+    entry for the same crop hint within `max_distance` differing bits. The
+    cache is LRU-bounded, entries expire after `ttl_seconds` of wall-clock
+    time, and the whole cache is written to `path` (JSON) after each insert
+    so results survive restarts.
+
+    Several worker processes may share one `path`. A save holds an exclusive
+    lock on `path`.lock, merges the entries other processes have written
+    since, and writes through a per-process temporary file, so workers
+    neither corrupt the file nor drop each other's results.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 86400,
+        max_distance: int = 6,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached results
+            ttl_seconds: Time a result stays valid after it was stored
+            max_distance: Largest Hamming distance treated as the same image
+            path: JSON file used for persistence (None = memory only)
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.path = path
+
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    @staticmethod
+    def _hint_key(crop_hint: Optional[str]) -> str:
+        hint = (crop_hint or "").strip().lower()
+        return "" if hint == "other" else hint
+
+    def get(self, image_hash: int, crop_hint: Optional[str]) -> Optional[Tuple[Any, int]]:
+        """
+        Find the closest cached result for a near-duplicate image
+
+        Args:
+            image_hash: dHash of the request image
+            crop_hint: Crop hint of the request
+
+        Returns:
+            (copy of the result, Hamming distance), or None on a miss
+        """
+        hint = self._hint_key(crop_hint)
+        now = time.time()
+        best_key, best_distance = None, self.max_distance + 1
+
+        with self._lock:
+            for key, (_, stored_at) in list(self._entries.items()):
+                if now - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                    continue
+                if key[0] != hint:
+                    continue
+                distance = (key[1] ^ image_hash).bit_count()
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[best_key][0]), best_distance
+
+    def put(self, image_hash: int, crop_hint: Optional[str], value: Any):
+        """Store a result and persist the cache"""
+        with self._lock:
+            key = (self._hint_key(crop_hint), image_hash)
+            self._entries[key] = (copy.deepcopy(value), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        self._save()
+
+    def _load(self):
+        """Read persisted entries, skipping expired ones"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            self._entries.update(self._read_file())
+            print(f"[OK] Loaded {len(self._entries)} cached online results from {self.path}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[FAIL] Could not load online cache from {self.path}: {str(e)}")
+
+    def _read_file(self) -> "OrderedDict[Tuple[str, int], Tuple[Any, float]]":
+        """Unexpired entries of the cache file, oldest first (empty if there is none)"""
+        entries = OrderedDict()
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r") as f:
+            records = json.load(f)
+        now = time.time()
+        for record in records[-self.max_entries:]:
+            if now - record["stored_at"] <= self.ttl_seconds:
+                key = (record["crop_hint"], int(record["hash"], 16))
+                entries[key] = (record["result"], record["stored_at"])
+        return entries
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the cache file shared by all processes using it"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, merge: bool = True):
+        """
+        Write all entries (oldest first) atomically to the cache file
+
+        Args:
+            merge: Keep entries other processes saved that this one does not hold
+        """
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        with self._save_lock:
+            try:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                with self._file_lock():
+                    if merge:
+                        try:
+                            on_disk = self._read_file()
+                        except (OSError, ValueError, KeyError, TypeError):
+                            on_disk = {}
+                        for key, (value, stored_at) in on_disk.items():
+                            if key not in entries or entries[key][1] < stored_at:
+                                entries[key] = (value, stored_at)
+
+                    newest = sorted(entries.items(), key=lambda item: item[1][1])[-self.max_entries:]
+                    records = [
+                        {"crop_hint": hint, "hash": f"{image_hash:016x}", "stored_at": stored_at, "result": value}
+                        for (hint, image_hash), (value, stored_at) in newest
+                    ]
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w") as f:
+                        json.dump(records, f)
+                    os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[FAIL] Could not save online cache to {self.path}: {str(e)}")
+
+    def clear(self):
+        """Drop all entries (and the persisted file)"""
+        with self._lock:
+            self._entries.clear()
+        self._save(merge=False)
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "max_distance": self.max_distance,
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,145 @@
+"""
+In-process LRU cache with TTL and single-flight for offline predictions
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.deadline import CancelToken, wait_future
+
+
+class PredictionCache:
+    """
+    Content-addressed cache for detection results
+
+    Entries are keyed by a hash of the decoded image bytes plus the request
+    parameters that affect the result. Concurrent lookups for a key that is
+    still being computed wait for that computation instead of repeating it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached results (LRU eviction beyond)
+            ttl_seconds: Time a result stays valid after it was computed
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(image_bytes: bytes, *params) -> str:
+        """
+        Build a cache key from image content and request parameters
+
+        Args:
+            image_bytes: Decoded (not base64) image bytes
+            *params: Values that affect the result, e.g. crop, top_k, model version
+
+        Returns:
+            Cache key string
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return ":".join([digest] + [str(p) for p in params])
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> Tuple[Any, str]:
+        """
+        Return a cached result or compute it once for all concurrent callers
+
+        Args:
+            key: Cache key from make_key()
+            compute: Function producing the result on a miss
+            cacheable: Optional predicate deciding whether a result is stored
+            cancel: Caller's token; a caller waiting on another's computation
+                    stops waiting (RequestCancelled) once it fires
+
+        Returns:
+            Tuple of (result, status) where status is "hit", "shared" or "miss".
+            Callers own the returned object and may modify it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value), "hit"
+                del self._entries[key]
+                self.expirations += 1
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return copy.deepcopy(wait_future(future, cancel, "inference", withdraw=False)), "shared"
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        stored = copy.deepcopy(value)
+        with self._lock:
+            if cacheable is None or cacheable(value):
+                self._entries[key] = (stored, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            self._inflight.pop(key, None)
+        future.set_result(stored)
+
+        return value, "miss"
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.shared
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.shared) / lookups, 3) if lookups else 0,
+                "inflight": len(self._inflight)
+            }
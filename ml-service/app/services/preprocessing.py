@@ -13,14 +13,21 @@ from typing import Tuple
 class ImagePreprocessor:
     """Handles image preprocessing for disease detection model"""
     
-    def __init__(self, target_size: Tuple[int, int] = (224, 224)):
+    MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+    
+    def __init__(self, target_size: Tuple[int, int] = (224, 224), channels_last: bool = False):
         """
         Initialize preprocessor with target image size
         
         Args:
             target_size: Target image dimensions (width, height)
+            channels_last: Build the tensor with NumPy directly from the HWC
+                           pixel array instead of the torchvision transform; the
+                           result is already in channels-last memory layout
         """
         self.target_size = target_size
+        self.channels_last = channels_last
         
         self.transform = transforms.Compose([
             transforms.Resize(target_size),
@@ -66,6 +73,12 @@ class ImagePreprocessor:
             Preprocessed image tensor
         """
         try:
+            if self.channels_last:
+                resized = image.resize(self.target_size, Image.Resampling.BILINEAR)
+                pixels = np.asarray(resized, dtype=np.float32) / 255.0
+                pixels = (pixels - self.MEAN) / self.STD
+                return torch.from_numpy(pixels).permute(2, 0, 1).unsqueeze(0)
+            
             tensor = self.transform(image)
             tensor = tensor.unsqueeze(0)
             return tensor
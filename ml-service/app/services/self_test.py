@@ -0,0 +1,94 @@
+"""
+Periodic background self-test with a cached result for health probes
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class SelfTestMonitor:
+    """
+    Runs a health check on a background thread and caches the outcome
+
+    Health endpoints read the cached result, so probe cost does not depend
+    on how expensive the check is or how often orchestrators poll.
+    """
+
+    def __init__(self, check: Callable[[], Dict], interval_s: float = 30, name: str = "self-test"):
+        """
+        Initialize monitor
+
+        Args:
+            check: Returns a dict with at least a "status" key
+            interval_s: Seconds between checks (0 = only run on demand)
+            name: Name used for the worker thread
+        """
+        self.check = check
+        self.interval_s = interval_s
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._result: Optional[Dict] = None
+        self._checked_at: Optional[float] = None
+        self.runs = 0
+        self.failures = 0
+
+    def start(self):
+        """Run the first check now and then every interval_s on a daemon thread"""
+        if self.interval_s <= 0:
+            self.run_once()
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current check"""
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            self.run_once()
+            if self._stop.wait(self.interval_s):
+                return
+
+    def run_once(self) -> Dict:
+        """Run the check synchronously and cache its result"""
+        start = time.monotonic()
+        try:
+            result = self.check()
+        except Exception as e:
+            result = {"status": "unhealthy", "error": str(e)}
+        duration_ms = int((time.monotonic() - start) * 1000)
+
+        with self._lock:
+            self._result = dict(result, check_duration_ms=duration_ms)
+            self._checked_at = time.monotonic()
+            self.runs += 1
+            if result.get("status") != "healthy":
+                self.failures += 1
+            return dict(self._result)
+
+    def get_status(self) -> Dict:
+        """
+        Cached result of the last check, without running anything
+
+        Returns:
+            Last result plus "last_check_age_s" (None if no check has run yet).
+            If results are older than three intervals the status is "stale".
+        """
+        with self._lock:
+            if self._result is None:
+                return {"status": "starting", "last_check_age_s": None}
+
+            age = time.monotonic() - self._checked_at
+            status = dict(self._result, last_check_age_s=round(age, 1))
+            if self.interval_s > 0 and age > 3 * self.interval_s:
+                status["status"] = "stale"
+            return status
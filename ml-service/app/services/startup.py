@@ -0,0 +1,79 @@
+"""
+Startup timeline: where cold-start time goes, phase by phase
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+
+def process_start_time() -> Optional[float]:
+    """Wall-clock time this process started, from /proc (None if unavailable)"""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/stat", "r") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+class StartupTimeline:
+    """
+    Records named startup phases relative to process start
+
+    The first phase, "process_boot", covers interpreter start-up and every
+    import that ran before this module was loaded (uvicorn, FastAPI, ...).
+    """
+
+    def __init__(self):
+        now = time.time()
+        self.process_start = process_start_time() or now
+        self.phases: List[Dict] = []
+        self.ready_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.record("process_boot", self.process_start, now)
+
+    def record(self, name: str, start: float, end: float, **details):
+        """Add a completed phase"""
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "start_offset_ms": int((start - self.process_start) * 1000),
+                "duration_ms": int((end - start) * 1000),
+                **details
+            })
+
+    @contextmanager
+    def phase(self, name: str, **details) -> Iterator[None]:
+        """Time the enclosed block as a phase"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.time(), **details)
+
+    def mark_ready(self):
+        """Mark the moment the service became ready to serve traffic"""
+        with self._lock:
+            if self.ready_at is None:
+                self.ready_at = time.time()
+
+    def get_timeline(self) -> Dict:
+        """Phases in start order plus time to ready"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p["start_offset_ms"])
+            ready_at = self.ready_at
+        return {
+            "process_start": datetime.utcfromtimestamp(self.process_start).isoformat(),
+            "ready": ready_at is not None,
+            "ready_after_ms": int((ready_at - self.process_start) * 1000) if ready_at else None,
+            "phases": phases
+        }
+
+
+startup_timeline = StartupTimeline()
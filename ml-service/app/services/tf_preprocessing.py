@@ -3,64 +3,124 @@ Image preprocessing for TensorFlow models
 """
 import io
 import base64
-from PIL import Image
+from PIL import Image, ImageOps
 import numpy as np
 from typing import Tuple
 
+PREPROCESS_MODES = ("resize", "native")
+INPUT_DTYPES = ("float32", "uint8")
+
 
 class TFImagePreprocessor:
     """Handles image preprocessing for TensorFlow disease detection models"""
     
-    def __init__(self, target_size: int = 256):
+    # Output pixels are never normalized here; the models rescale them themselves
+    value_range = (0, 255)
+    
+    def __init__(self, target_size: int = 256, mode: str = "resize", jpeg_draft: bool = False, dtype: str = "float32"):
         """
         Initialize preprocessor with target image size
         
         Args:
             target_size: Target image dimension (width and height)
+            mode: "resize" to apply EXIF orientation and resize to target_size
+                  before inference, "native" to pass the full-resolution image
+            jpeg_draft: In "resize" mode, let the JPEG decoder scale down by
+                  1/2, 1/4 or 1/8 (DCT scaling) to the smallest size that still
+                  covers target_size, then finish with a regular resize
+            dtype: "float32", or "uint8" to hand the decoded pixels to the model
+                   without widening them (for models exported with a uint8
+                   input signature; a quarter of the bytes per image)
         """
+        if mode not in PREPROCESS_MODES:
+            raise ValueError(f"Unknown preprocess mode: {mode}. Available: {list(PREPROCESS_MODES)}")
+        if dtype not in INPUT_DTYPES:
+            raise ValueError(f"Unknown input dtype: {dtype}. Available: {list(INPUT_DTYPES)}")
+        
         self.target_size = (target_size, target_size)
+        self.mode = mode
+        self.jpeg_draft = jpeg_draft
+        self.dtype = dtype
     
-    def decode_base64_image(self, base64_string: str) -> Image.Image:
+    def decode_base64(self, base64_string: str) -> bytes:
         """
-        Decode base64 string to PIL Image
+        Decode base64 string (optionally a data URL) to raw image bytes
         
         Args:
             base64_string: Base64 encoded image string
             
         Returns:
-            PIL Image object
+            Encoded image bytes
         """
         try:
             if ',' in base64_string:
                 base64_string = base64_string.split(',')[1]
             
-            image_bytes = base64.b64decode(base64_string)
+            return base64.b64decode(base64_string)
+        except Exception as e:
+            raise ValueError(f"Failed to decode base64 image: {str(e)}")
+    
+    def decode_image_bytes(self, image_bytes: bytes) -> Image.Image:
+        """
+        Decode raw image bytes to PIL Image
+        
+        Args:
+            image_bytes: Encoded image bytes (JPEG, PNG, ...)
+            
+        Returns:
+            PIL Image object
+        """
+        try:
             image = Image.open(io.BytesIO(image_bytes))
             
+            if self.mode == "resize":
+                if self.jpeg_draft and image.format == "JPEG":
+                    image.draft('RGB', self.target_size)
+                image = ImageOps.exif_transpose(image)
+            
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
             return image
         except Exception as e:
-            raise ValueError(f"Failed to decode base64 image: {str(e)}")
+            raise ValueError(f"Failed to decode image: {str(e)}")
+    
+    def decode_base64_image(self, base64_string: str) -> Image.Image:
+        """
+        Decode base64 string to PIL Image
+        
+        Args:
+            base64_string: Base64 encoded image string
+            
+        Returns:
+            PIL Image object
+        """
+        return self.decode_image_bytes(self.decode_base64(base64_string))
     
     def preprocess(self, image: Image.Image) -> np.ndarray:
         """
         Preprocess image for TensorFlow model input
         
         NOTE: The saved models have built-in preprocessing layers (Resizing + Rescaling).
-        We only convert to numpy array - the model handles resizing and normalization.
+        In "resize" mode we resize to the fixed model input size up front so every
+        request has the same shape and a small tensor; in "native" mode the model
+        does the resizing. Normalization is always left to the model.
         
         Args:
             image: PIL Image object
             
         Returns:
-            Numpy array (1, height, width, 3) with values in [0, 255] range
+            Numpy array (1, height, width, 3) with values in [0, 255] range,
+            float32 or uint8 depending on the preprocessor dtype
         """
         try:
-            img_array = np.array(image)
+            if self.mode == "resize" and image.size != self.target_size:
+                image = image.resize(self.target_size, Image.Resampling.BILINEAR)
             
-            img_array = img_array.astype(np.float32)
+            img_array = np.asarray(image)
+            
+            if self.dtype == "float32":
+                img_array = img_array.astype(np.float32)
             
             img_array = np.expand_dims(img_array, axis=0)
             
@@ -81,6 +141,19 @@ class TFImagePreprocessor:
         image = self.decode_base64_image(base64_string)
         return self.preprocess(image)
     
+    def preprocess_from_bytes(self, image_bytes: bytes) -> np.ndarray:
+        """
+        Decode and preprocess raw image bytes
+        
+        Args:
+            image_bytes: Encoded image bytes
+            
+        Returns:
+            Preprocessed numpy array
+        """
+        image = self.decode_image_bytes(image_bytes)
+        return self.preprocess(image)
+    
     def get_image_info(self, image: Image.Image) -> dict:
         """
         Get image metadata
@@ -0,0 +1,135 @@
+"""
+Compare base64 JSON uploads with raw binary and multipart uploads
+
+In-process (default) times the request-handling work that differs between the
+two paths: JSON parsing, base64 decoding and image decoding. With --url it
+drives a running service end to end.
+
+Usage:
+    python -m benchmarks.bench_upload
+    python -m benchmarks.bench_upload --url http://localhost:8000 --crop tomato
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.images import RESOLUTIONS, make_jpeg, to_base64
+
+
+def _time(fn: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: List[float]) -> Dict:
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "max_ms": round(max(timings), 2),
+    }
+
+
+def bench_in_process(resolutions: List[str], iterations: int) -> Dict:
+    """Time the decode path for base64 JSON bodies vs raw bytes"""
+    from pydantic import BaseModel
+    from app.services.tf_preprocessing import TFImagePreprocessor
+
+    class DetectionBody(BaseModel):
+        image_base64: str
+        crop: str
+        mode: str = "offline"
+        top_k: int = 3
+
+    preprocessor = TFImagePreprocessor(target_size=256)
+    results = {}
+
+    for name in resolutions:
+        image_bytes = make_jpeg(RESOLUTIONS[name])
+        json_body = json.dumps({"image_base64": to_base64(image_bytes), "crop": "tomato"}).encode()
+
+        def base64_path():
+            body = DetectionBody.model_validate_json(json_body)
+            raw = preprocessor.decode_base64(body.image_base64)
+            return preprocessor.preprocess_from_bytes(raw)
+
+        def binary_path():
+            return preprocessor.preprocess_from_bytes(image_bytes)
+
+        results[name] = {
+            "payload_bytes": {"base64_json": len(json_body), "binary": len(image_bytes)},
+            "base64_json": _summary(_time(base64_path, iterations)),
+            "binary": _summary(_time(binary_path, iterations)),
+        }
+
+    return results
+
+
+def bench_http(url: str, crop: str, resolutions: List[str], iterations: int) -> Dict:
+    """Time full requests against a running service"""
+    import httpx
+
+    session = httpx.Client(timeout=60)
+    results = {}
+
+    for name in resolutions:
+        image_bytes = make_jpeg(RESOLUTIONS[name])
+        image_base64 = to_base64(image_bytes)
+
+        def base64_json():
+            r = session.post(f"{url}/ml/detect-disease", json={"image_base64": image_base64, "crop": crop})
+            r.raise_for_status()
+
+        def raw_jpeg():
+            r = session.post(
+                f"{url}/ml/detect-disease/upload",
+                params={"crop": crop},
+                content=image_bytes,
+                headers={"Content-Type": "image/jpeg"}
+            )
+            r.raise_for_status()
+
+        def multipart():
+            r = session.post(
+                f"{url}/ml/detect-disease/upload",
+                data={"crop": crop},
+                files={"image": ("leaf.jpg", image_bytes, "image/jpeg")}
+            )
+            r.raise_for_status()
+
+        base64_json()
+        results[name] = {
+            "payload_bytes": {"base64_json": len(image_base64), "binary": len(image_bytes)},
+            "base64_json": _summary(_time(base64_json, iterations)),
+            "raw_jpeg": _summary(_time(raw_jpeg, iterations)),
+            "multipart": _summary(_time(multipart, iterations)),
+        }
+
+    session.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running ML service (omit for in-process)")
+    parser.add_argument("--crop", default="tomato")
+    parser.add_argument("--resolutions", default="1mp,3mp,12mp", help=f"Comma separated: {','.join(RESOLUTIONS)}")
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    resolutions = args.resolutions.split(",")
+    if args.url:
+        results = bench_http(args.url.rstrip("/"), args.crop, resolutions, args.iterations)
+    else:
+        results = bench_in_process(resolutions, args.iterations)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
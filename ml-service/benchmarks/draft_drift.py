@@ -0,0 +1,118 @@
+"""
+Report how far JPEG draft-mode decoding moves predictions from full decoding
+
+For every sample image and crop model, the image is preprocessed twice (full
+decode + resize, and draft decode + resize) and run through the model. The
+SavedModels are not bit-for-bit deterministic between calls, so the report
+also measures the full-vs-full drift as a noise floor.
+
+Usage:
+    python -m benchmarks.draft_drift
+    python -m benchmarks.draft_drift --images path/to/jpegs --crops tomato,potato
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.images import RESOLUTIONS, make_jpeg
+from app.services.tf_preprocessing import TFImagePreprocessor
+from app.models.tf_disease_detector import TFDiseaseDetector, get_available_crops
+
+
+def load_samples(images_dir: str, limit: int) -> List[bytes]:
+    """Read sample JPEGs from a directory, or generate synthetic ones"""
+    if images_dir:
+        names = sorted(
+            f for f in os.listdir(images_dir)
+            if f.lower().endswith(('.jpg', '.jpeg'))
+        )[:limit]
+        samples = []
+        for name in names:
+            with open(os.path.join(images_dir, name), 'rb') as f:
+                samples.append(f.read())
+        return samples
+
+    sizes = [RESOLUTIONS["1mp"], RESOLUTIONS["3mp"], RESOLUTIONS["12mp"]]
+    return [make_jpeg(sizes[i % len(sizes)], seed=i) for i in range(limit)]
+
+
+def class_probs(detector: TFDiseaseDetector, image_array: np.ndarray, repeats: int) -> np.ndarray:
+    """Mean class probabilities over several calls, in class order"""
+    index = {name: i for i, name in enumerate(detector.classes)}
+    probs = np.zeros(len(detector.classes))
+    for _ in range(repeats):
+        for pred in detector.predict(image_array, top_k=len(detector.classes)):
+            probs[index[pred["class_name"]]] += pred["confidence"]
+    return probs / repeats
+
+
+def timed_preprocess(preprocessor: TFImagePreprocessor, image_bytes: bytes):
+    start = time.perf_counter()
+    image_array = preprocessor.preprocess_from_bytes(image_bytes)
+    return image_array, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="Directory of sample JPEGs (default: synthetic)")
+    parser.add_argument("--crops", default=",".join(get_available_crops()))
+    parser.add_argument("--limit", type=int, default=12)
+    parser.add_argument("--repeats", type=int, default=5, help="Model calls averaged per prediction")
+    args = parser.parse_args()
+
+    full = TFImagePreprocessor(target_size=256, mode="resize", jpeg_draft=False)
+    draft = TFImagePreprocessor(target_size=256, mode="resize", jpeg_draft=True)
+    samples = load_samples(args.images, args.limit)
+
+    prepared = []
+    full_ms, draft_ms, pixel_diff = [], [], []
+    for image_bytes in samples:
+        full_array, t_full = timed_preprocess(full, image_bytes)
+        draft_array, t_draft = timed_preprocess(draft, image_bytes)
+        full_ms.append(t_full)
+        draft_ms.append(t_draft)
+        pixel_diff.append(float(np.abs(full_array - draft_array).mean()))
+        prepared.append((full_array, draft_array))
+
+    report: Dict = {
+        "images": len(samples),
+        "decode": {
+            "full_p50_ms": round(statistics.median(full_ms), 2),
+            "draft_p50_ms": round(statistics.median(draft_ms), 2),
+            "speedup": round(statistics.median(full_ms) / statistics.median(draft_ms), 2),
+            "mean_abs_pixel_diff": round(statistics.fmean(pixel_diff), 3),
+        },
+        "crops": {},
+    }
+
+    for crop in args.crops.split(","):
+        detector = TFDiseaseDetector(crop)
+        detector.load_model()
+
+        agree, draft_delta, noise_delta = 0, [], []
+        for full_array, draft_array in prepared:
+            p_full = class_probs(detector, full_array, args.repeats)
+            p_full_again = class_probs(detector, full_array, args.repeats)
+            p_draft = class_probs(detector, draft_array, args.repeats)
+
+            agree += int(p_full.argmax() == p_draft.argmax())
+            draft_delta.append(float(np.abs(p_full - p_draft).max()))
+            noise_delta.append(float(np.abs(p_full - p_full_again).max()))
+
+        report["crops"][crop] = {
+            "top1_agreement": round(agree / len(prepared), 3),
+            "mean_max_prob_delta": round(statistics.fmean(draft_delta), 4),
+            "worst_max_prob_delta": round(max(draft_delta), 4),
+            "noise_floor_mean_max_prob_delta": round(statistics.fmean(noise_delta), 4),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
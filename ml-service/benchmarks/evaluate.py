@@ -0,0 +1,254 @@
+"""
+Evaluate crop models on labeled images: accuracy, confusion matrix, throughput
+
+Reads a PlantVillage-style directory (one sub-folder per class name from
+app/data/crop_classes.json; folders for several crops may share one
+directory) and runs every image through the production code path: the
+service's TFImagePreprocessor settings (PREPROCESS_MODE, JPEG_DRAFT_DECODE,
+MODEL_INPUT_DTYPE) and predict_batch of the detector create_detector builds,
+so MODEL_BACKEND (savedmodel, tflite, mock) applies. Unreadable or corrupt
+images are skipped and counted.
+
+Images are decoded and preprocessed on a thread pool while the model runs on
+the main thread; at most --prefetch batches are kept ready ahead of the
+model, so memory stays bounded for large datasets.
+
+Usage:
+    python -m benchmarks.evaluate --data path/to/PlantVillage
+    python -m benchmarks.evaluate --data path/to/PlantVillage --crops tomato --batch-size 32 --output eval.json
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.models.tf_disease_detector import create_detector, get_available_crops
+from app.services.tf_preprocessing import TFImagePreprocessor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def list_labeled(data_dir: str, classes: List[str], limit: int = 0) -> List[Tuple[str, int]]:
+    """(path, class index) for every image in the class folders present in data_dir"""
+    samples = []
+    for label, class_name in enumerate(classes):
+        folder = os.path.join(data_dir, class_name)
+        if not os.path.isdir(folder):
+            continue
+        names = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if limit:
+            names = names[:limit]
+        samples.extend((os.path.join(folder, name), label) for name in names)
+    return samples
+
+
+def load_sample(preprocessor: TFImagePreprocessor, path: str) -> np.ndarray:
+    """Read and preprocess one image exactly as the service does"""
+    with open(path, "rb") as f:
+        image = preprocessor.decode_image_bytes(f.read())
+    return preprocessor.preprocess(image)[0]
+
+
+def prefetch_batches(
+    samples: List[Tuple[str, int]],
+    preprocessor: TFImagePreprocessor,
+    batch_size: int,
+    workers: int,
+    prefetch: int
+) -> Iterator[Tuple[Optional[np.ndarray], np.ndarray, List[str], float]]:
+    """
+    Decode images on a thread pool and yield model-ready batches in order
+
+    A producer thread keeps up to workers * 2 decodes in flight and a queue
+    of at most `prefetch` finished batches. Images whose preprocessed shape
+    differs from the current batch ("native" mode) start a new batch.
+
+    Yields:
+        (images or None, labels, paths of failed images, decode seconds)
+    """
+    batches: "queue.Queue" = queue.Queue(maxsize=max(1, prefetch))
+    done = object()
+
+    def produce():
+        pending: deque = deque()
+        images, labels, failed = [], [], []
+        decode_time = 0.0
+
+        def flush():
+            nonlocal images, labels, failed, decode_time
+            if images or failed:
+                batch = np.stack(images) if images else None
+                batches.put((batch, np.array(labels, dtype=np.int64), failed, decode_time))
+            images, labels, failed, decode_time = [], [], [], 0.0
+
+        def collect():
+            nonlocal decode_time
+            path, label, future = pending.popleft()
+            try:
+                array, seconds = future.result()
+            except (ValueError, OSError) as e:
+                # OSError covers unreadable files and PIL's UnidentifiedImageError
+                print(f"[FAIL] {path}: {str(e)}", file=sys.stderr)
+                failed.append(path)
+                return
+            if images and array.shape != images[0].shape:
+                flush()
+            images.append(array)
+            labels.append(label)
+            decode_time += seconds
+            if len(images) >= batch_size:
+                flush()
+
+        def timed_load(path: str) -> Tuple[np.ndarray, float]:
+            start = time.perf_counter()
+            return load_sample(preprocessor, path), time.perf_counter() - start
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eval-decode") as pool:
+                for path, label in samples:
+                    pending.append((path, label, pool.submit(timed_load, path)))
+                    if len(pending) >= workers * 2:
+                        collect()
+                while pending:
+                    collect()
+            flush()
+        finally:
+            batches.put(done)
+
+    producer = threading.Thread(target=produce, name="eval-prefetch", daemon=True)
+    producer.start()
+    while True:
+        item = batches.get()
+        if item is done:
+            break
+        yield item
+    producer.join()
+
+
+def evaluate_crop(
+    crop: str,
+    data_dir: str,
+    batch_size: int,
+    workers: int,
+    prefetch: int,
+    limit: int
+) -> Optional[Dict]:
+    """
+    Evaluate one crop model
+
+    Returns:
+        Report with accuracy, per-class accuracy, confusion matrix and
+        throughput, or None if no labeled images were found for the crop
+    """
+    detector = create_detector(crop)
+    samples = list_labeled(data_dir, detector.crop_config['classes'], limit)
+    if not samples:
+        print(f"[FAIL] {crop}: no class folders for {crop} in {data_dir}", file=sys.stderr)
+        return None
+
+    detector.load_model()
+    preprocessor = TFImagePreprocessor(
+        target_size=256,
+        mode=settings.PREPROCESS_MODE,
+        jpeg_draft=settings.JPEG_DRAFT_DECODE,
+        dtype=settings.MODEL_INPUT_DTYPE
+    )
+
+    index = {name: i for i, name in enumerate(detector.classes)}
+    num_classes = len(detector.classes)
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    failed: List[str] = []
+    decode_time = inference_time = 0.0
+
+    start = time.perf_counter()
+    for images, labels, batch_failed, batch_decode_time in prefetch_batches(
+        samples, preprocessor, batch_size, workers, prefetch
+    ):
+        failed.extend(batch_failed)
+        decode_time += batch_decode_time
+        if images is None:
+            continue
+
+        infer_start = time.perf_counter()
+        predictions = detector.predict_batch(images, top_k=1)
+        inference_time += time.perf_counter() - infer_start
+
+        for label, top in zip(labels, predictions):
+            confusion[label, index[top[0]["class_name"]]] += 1
+    wall = time.perf_counter() - start
+
+    evaluated = int(confusion.sum())
+    per_class = {}
+    for i, class_name in enumerate(detector.classes):
+        support = int(confusion[i].sum())
+        predicted = int(confusion[:, i].sum())
+        if not support and not predicted:
+            continue
+        per_class[class_name] = {
+            "support": support,
+            "accuracy": round(confusion[i, i] / support, 4) if support else None,
+            "precision": round(confusion[i, i] / predicted, 4) if predicted else None,
+        }
+
+    print(f"[OK] {crop}: {evaluated} images ({len(failed)} skipped), accuracy {np.trace(confusion) / max(1, evaluated):.4f}, "
+          f"{evaluated / wall:.1f} images/s", file=sys.stderr)
+
+    return {
+        "backend": detector.backend,
+        "images": evaluated,
+        "skipped": len(failed),
+        "failed": failed,
+        "accuracy": round(float(np.trace(confusion) / evaluated), 4) if evaluated else None,
+        "per_class": per_class,
+        "confusion_matrix": {
+            "labels": detector.classes,
+            "matrix": confusion.tolist(),
+        },
+        "throughput": {
+            "images_per_s": round(evaluated / wall, 2) if wall else 0,
+            "wall_s": round(wall, 3),
+            "decode_s": round(decode_time, 3),
+            "inference_s": round(inference_time, 3),
+            "inference_images_per_s": round(evaluated / inference_time, 2) if inference_time else 0,
+            "batch_size": batch_size,
+            "decode_workers": workers,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="Labeled image directory (one folder per class name)")
+    parser.add_argument("--crops", default=",".join(get_available_crops()))
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_MAX_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Decode threads")
+    parser.add_argument("--prefetch", type=int, default=4, help="Batches decoded ahead of the model")
+    parser.add_argument("--limit", type=int, default=0, help="Images per class (0 = all)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for crop in args.crops.split(","):
+        result = evaluate_crop(crop, args.data, max(1, args.batch_size), max(1, args.workers), args.prefetch, args.limit)
+        if result is not None:
+            report[crop] = result
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(0 if report else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Synthetic test images for benchmarks
+"""
+import io
+import base64
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+RESOLUTIONS = {
+    "256": (256, 256),
+    "1mp": (1280, 960),
+    "3mp": (2048, 1536),
+    "12mp": (4000, 3000),
+}
+
+
+def make_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """
+    Create a leaf-like synthetic RGB image
+
+    Smooth green gradients with blotches and sensor noise compress roughly
+    like real phone photos, unlike solid colors or pure noise.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        seed: Random seed
+
+    Returns:
+        PIL Image object
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    yy /= height
+    xx /= width
+
+    r = 60 + 40 * np.sin(3 * xx + rng.uniform(0, 6))
+    g = 120 + 60 * np.cos(2 * yy + rng.uniform(0, 6))
+    b = 40 + 30 * np.sin(4 * (xx + yy))
+    img = np.stack([r, g, b], axis=-1)
+
+    for _ in range(12):
+        cx, cy = rng.uniform(0, 1, size=2)
+        radius = rng.uniform(0.02, 0.08)
+        mask = ((xx - cx) ** 2 + (yy - cy) ** 2) < radius ** 2
+        img[mask] = rng.uniform(60, 160, size=3)
+
+    img += rng.normal(0, 6, size=img.shape)
+    return Image.fromarray(np.clip(img, 0, 255).astype(np.uint8), "RGB")
+
+
+def make_jpeg(size: Tuple[int, int], seed: int = 0, quality: int = 90) -> bytes:
+    """Create a synthetic JPEG of the given (width, height)"""
+    buffered = io.BytesIO()
+    make_image(size[0], size[1], seed).save(buffered, format="JPEG", quality=quality)
+    return buffered.getvalue()
+
+
+def to_base64(image_bytes: bytes) -> str:
+    """Encode image bytes as base64 text"""
+    return base64.b64encode(image_bytes).decode('utf-8')
@@ -0,0 +1,278 @@
+"""
+Load test /ml/detect-disease in process or against a running service
+
+Drives the endpoint with synthetic leaf JPEGs at several resolutions and
+concurrency levels, per crop and mode, and reports p50/p95/p99 latency,
+throughput and peak RSS as JSON. In-process mode serves the FastAPI app
+through an ASGI transport, so admission control, batching and model code all
+run as in production; the prediction cache is disabled so repeated images are
+not served from memory. For --url runs, start the service with
+PREDICTION_CACHE_ENABLED=false and pass --pid to sample its RSS.
+
+Save a run with --output and compare later runs against it with --baseline.
+The process exits with status 1 when any scenario regressed by more than
+--tolerance in p95 latency or throughput.
+
+Usage:
+    python -m benchmarks.load_test --output baseline.json
+    python -m benchmarks.load_test --baseline baseline.json
+    python -m benchmarks.load_test --url http://localhost:8000 --pid 1234 --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from benchmarks.images import RESOLUTIONS, make_jpeg, to_base64
+
+ENDPOINT = "/ml/detect-disease"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0-100) of a non-empty list"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of a process (0 if unavailable)"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class RSSSampler:
+    """Tracks the peak RSS of a process from a background thread"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.01):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.pid:
+            self.peak = rss_bytes(self.pid)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes(self.pid))
+
+
+async def run_scenario(
+    client,
+    payloads: List[Dict],
+    requests: int,
+    concurrency: int,
+    pid: Optional[int]
+) -> Dict:
+    """
+    Send `requests` detection calls with at most `concurrency` in flight
+
+    Args:
+        client: httpx.AsyncClient bound to the service
+        payloads: JSON bodies, used round-robin
+        requests: Number of measured requests
+        concurrency: Maximum concurrent requests
+        pid: Process whose RSS is sampled (None to skip)
+
+    Returns:
+        Latency percentiles, throughput, status codes and peak RSS
+    """
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    cached = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, cached
+        while next_index < requests:
+            payload = payloads[next_index % len(payloads)]
+            next_index += 1
+
+            start = time.perf_counter()
+            response = await client.post(ENDPOINT, json=payload)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            code = str(response.status_code)
+            status_codes[code] = status_codes.get(code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                cached += bool(response.json().get("cached"))
+
+    with RSSSampler(pid) as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": requests - len(latencies),
+        "status_codes": status_codes,
+        "cached": cached,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0,
+        "peak_rss_mb": round(sampler.peak / (1024 * 1024), 1) if pid else None,
+    }
+    if latencies:
+        result.update({
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+        })
+    return result
+
+
+async def run_suite(args) -> Dict:
+    """Run every crop x mode x resolution x concurrency scenario"""
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url.rstrip("/"), timeout=args.timeout)
+        pid = args.pid
+    else:
+        from app.config import settings
+        settings.PREDICTION_CACHE_ENABLED = False
+        settings.BACKGROUND_MODEL_LOADING = False
+        from app.main import app
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://benchmark",
+            timeout=args.timeout
+        )
+        pid = os.getpid()
+
+    results = {}
+    async with client:
+        for name in args.resolutions.split(","):
+            images = [to_base64(make_jpeg(RESOLUTIONS[name], seed)) for seed in range(args.images)]
+
+            for crop in args.crops.split(","):
+                for mode in args.modes.split(","):
+                    payloads = [
+                        {"image_base64": image, "crop": crop, "mode": mode, "top_k": 3}
+                        for image in images
+                    ]
+                    for payload in payloads[:args.warmup]:
+                        await client.post(ENDPOINT, json=payload)
+
+                    for concurrency in (int(c) for c in args.concurrency.split(",")):
+                        key = f"{crop}/{mode}/{name}/c{concurrency}"
+                        results[key] = await run_scenario(client, payloads, args.requests, concurrency, pid)
+                        print(f"[OK] {key}: p95 {results[key].get('p95_ms')} ms, "
+                              f"{results[key]['throughput_rps']} req/s", file=sys.stderr)
+
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Find scenarios that regressed against a baseline run
+
+    Args:
+        results: Current scenario results
+        baseline: Scenario results from a stored run
+        tolerance: Allowed relative change (0.15 = 15%)
+
+    Returns:
+        One entry per regressed metric
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+
+        if previous.get("p95_ms") and current.get("p95_ms") is not None:
+            change = current["p95_ms"] / previous["p95_ms"] - 1
+            if change > tolerance:
+                regressions.append({"scenario": key, "metric": "p95_ms", "baseline": previous["p95_ms"],
+                                    "current": current["p95_ms"], "change": round(change, 3)})
+
+        if previous.get("throughput_rps"):
+            change = current["throughput_rps"] / previous["throughput_rps"] - 1
+            if change < -tolerance:
+                regressions.append({"scenario": key, "metric": "throughput_rps", "baseline": previous["throughput_rps"],
+                                    "current": current["throughput_rps"], "change": round(change, 3)})
+
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append({"scenario": key, "metric": "errors", "baseline": previous.get("errors", 0),
+                                "current": current["errors"], "change": None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running ML service (omit for in-process)")
+    parser.add_argument("--pid", type=int, help="PID of the service for RSS sampling with --url")
+    parser.add_argument("--crops", default="tomato,potato,pepperbell")
+    parser.add_argument("--modes", default="offline", help="Comma separated: offline,online")
+    parser.add_argument("--resolutions", default="256,1mp,3mp", help=f"Comma separated: {','.join(RESOLUTIONS)}")
+    parser.add_argument("--concurrency", default="1,8", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--images", type=int, default=8, help="Distinct images per resolution")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per crop and mode")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "target": args.url or "in-process",
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "requests_per_scenario": args.requests,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        report["baseline"] = {"file": args.baseline, "tolerance": args.tolerance, "regressions": regressions}
+        for regression in regressions:
+            print(f"[FAIL] {regression['scenario']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
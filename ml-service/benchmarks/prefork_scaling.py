@@ -0,0 +1,166 @@
+"""
+Measure how the pre-fork launcher scales with the number of workers
+
+For each worker count, starts `python -m app.serve` on a free port, waits
+for /readyz, drives /ml/detect-disease with concurrent requests and reports
+throughput, latency percentiles and, per worker, the requests it served
+(from the X-Worker-Pid header) with its RSS, PSS and USS. Total PSS is the
+memory the whole process tree really uses, so it shows how much the
+copy-on-write sharing saves compared with N independent processes.
+
+The prediction cache is disabled in the launched service. Extra service
+settings (e.g. MODEL_BACKEND=tflite) are taken from the environment.
+
+Usage:
+    python -m benchmarks.prefork_scaling --workers 1,2,4
+    MODEL_BACKEND=tflite python -m benchmarks.prefork_scaling --workers 1,2,4 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from app.serve import memory_stats
+from benchmarks.images import make_jpeg, to_base64
+from benchmarks.load_test import ENDPOINT, percentile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+async def drive(url: str, payloads: List[Dict], requests: int, concurrency: int) -> Dict:
+    import httpx
+
+    latencies: List[float] = []
+    per_worker: Dict[str, int] = {}
+    errors = 0
+    next_index = 0
+
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        async def worker():
+            nonlocal next_index, errors
+            while next_index < requests:
+                payload = payloads[next_index % len(payloads)]
+                next_index += 1
+                start = time.perf_counter()
+                response = await client.post(ENDPOINT, json=payload, headers={"Connection": "close"})
+                elapsed = (time.perf_counter() - start) * 1000
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                pid = response.headers.get("x-worker-pid", "?")
+                per_worker[pid] = per_worker.get(pid, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    result = {
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0,
+        "requests_per_worker": per_worker,
+    }
+    if latencies:
+        result.update({
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+        })
+    return result
+
+
+def run_workers(workers: int, args, payloads: List[Dict]) -> Dict:
+    import httpx
+
+    port = free_port()
+    env = dict(os.environ, PREDICTION_CACHE_ENABLED="false", PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--workers", str(workers), "--port", str(port),
+         "--host", "127.0.0.1", "--stats-interval", "0", "--log-level", "warning"],
+        env=env,
+        stdout=sys.stderr
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    try:
+        deadline = time.monotonic() + args.startup_timeout
+        ready = set()
+        while len(ready) < workers and time.monotonic() < deadline:
+            try:
+                response = httpx.get(f"{url}/readyz", headers={"Connection": "close"}, timeout=5)
+                if response.status_code == 200:
+                    ready.add(response.headers.get("x-worker-pid"))
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        if len(ready) < workers:
+            raise RuntimeError(f"Only {len(ready)} of {workers} workers became ready")
+
+        asyncio.run(drive(url, payloads, args.warmup * workers, workers))
+        result = asyncio.run(drive(url, payloads, args.requests, args.concurrency))
+
+        parent = memory_stats(process.pid)
+        children = {str(pid): memory_stats(pid) for pid in child_pids(process.pid)}
+        result.update({
+            "workers": workers,
+            "parent_memory": parent,
+            "worker_memory": children,
+            "total_pss_mb": round(parent.get("pss_mb", 0) + sum(m.get("pss_mb", 0) for m in children.values()), 1),
+            "total_rss_mb": round(parent.get("rss_mb", 0) + sum(m.get("rss_mb", 0) for m in children.values()), 1),
+        })
+        return result
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated worker counts")
+    parser.add_argument("--crop", default="tomato")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=4, help="Unmeasured requests per worker")
+    parser.add_argument("--startup-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    images = [to_base64(make_jpeg((640, 480), seed)) for seed in range(8)]
+    payloads = [{"image_base64": image, "crop": args.crop, "mode": "offline"} for image in images]
+
+    report = {"cpu_count": os.cpu_count(), "results": {}}
+    baseline = None
+    for workers in (int(w) for w in args.workers.split(",")):
+        result = run_workers(workers, args, payloads)
+        baseline = baseline or result
+        result["speedup"] = round(result["throughput_rps"] / baseline["throughput_rps"], 2) if baseline["throughput_rps"] else None
+        report["results"][f"workers_{workers}"] = result
+        print(f"[OK] {workers} workers: {result['throughput_rps']} req/s, p95 {result.get('p95_ms')} ms, "
+              f"total pss {result['total_pss_mb']} MB", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Compare TFLite backends with the SavedModel backend for accuracy and latency
+
+Each engine is loaded through TFDiseaseDetector, as in production. Predictions
+are compared with the augmentation-free float32 reference graph
+(app.models.inference_graph), since the SavedModel itself is not
+deterministic between calls. With --data pointing at a PlantVillage-style
+directory (one sub-folder per class name), accuracy is reported as well.
+
+Convert the models first:
+    python -m app.models.tflite_converter --quantization dynamic
+    python -m app.models.tflite_converter --quantization int8
+
+Usage:
+    python -m benchmarks.tflite_compare
+    python -m benchmarks.tflite_compare --crops tomato --data path/to/PlantVillage
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from app.models.inference_graph import build_inference_module
+from app.models.tf_disease_detector import TFDiseaseDetector, get_available_crops, resolve_model_path
+from app.models.tflite_converter import QUANTIZATIONS, synthetic_images
+from app.services.model_registry import get_rss_bytes
+
+
+def load_labeled(data_dir: str, classes: List[str], per_class: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Load up to per_class images for each class folder present in data_dir"""
+    images, labels = [], []
+    for label, class_name in enumerate(classes):
+        folder = os.path.join(data_dir, class_name)
+        if not os.path.isdir(folder):
+            continue
+        names = sorted(f for f in os.listdir(folder) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        for name in names[:per_class]:
+            image = Image.open(os.path.join(folder, name)).convert('RGB').resize((256, 256), Image.Resampling.BILINEAR)
+            images.append(np.asarray(image, dtype=np.float32))
+            labels.append(label)
+    return np.stack(images), np.array(labels)
+
+
+def make_detector(crop: str, backend: str, tflite_path: Optional[str] = None) -> Tuple[TFDiseaseDetector, int, float]:
+    """Load a detector with an overridden backend; returns (detector, rss delta, load ms)"""
+    detector = TFDiseaseDetector(crop)
+    detector.backend = backend
+    if tflite_path:
+        detector.crop_config = dict(detector.crop_config, tflite_path=tflite_path)
+
+    rss_before = get_rss_bytes()
+    start = time.perf_counter()
+    detector.load_model()
+    return detector, max(0, get_rss_bytes() - rss_before), (time.perf_counter() - start) * 1000
+
+
+def probabilities(detector: TFDiseaseDetector, images: np.ndarray) -> np.ndarray:
+    """Class probabilities in class order for every image, batch size 1"""
+    index = {name: i for i, name in enumerate(detector.classes)}
+    probs = np.zeros((len(images), len(detector.classes)))
+    for row, image in enumerate(images):
+        for pred in detector.predict(image[np.newaxis], top_k=len(detector.classes)):
+            probs[row, index[pred["class_name"]]] = pred["confidence"]
+    return probs
+
+
+def latency(detector: TFDiseaseDetector, image: np.ndarray, iterations: int) -> Dict:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        detector.predict(image[np.newaxis], top_k=3)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+    }
+
+
+def compare_crop(crop: str, data_dir: Optional[str], per_class: int, num_synthetic: int, iterations: int) -> Dict:
+    savedmodel, rss, load_ms = make_detector(crop, "savedmodel")
+    model_dir = resolve_model_path(savedmodel.crop_config['model_path'])
+    reference = build_inference_module(model_dir)
+
+    labels = None
+    if data_dir:
+        images, labels = load_labeled(data_dir, savedmodel.classes, per_class)
+    else:
+        images = np.concatenate(list(synthetic_images(num_synthetic)))
+
+    ref_probs = reference.serve(tf.constant(images))["output_0"].numpy()
+    engines = {"savedmodel": (savedmodel, rss, load_ms)}
+
+    for quantization in QUANTIZATIONS:
+        path = os.path.join(os.path.dirname(model_dir), "tflite", f"model_{quantization}.tflite")
+        if os.path.exists(path):
+            engines[f"tflite_{quantization}"] = make_detector(crop, "tflite", path)
+
+    report = {"images": len(images), "engines": {}}
+    for name, (detector, rss, load_ms) in engines.items():
+        probs = probabilities(detector, images)
+        entry = {
+            "top1_agreement_vs_reference": round(float((probs.argmax(1) == ref_probs.argmax(1)).mean()), 4),
+            "max_prob_delta_vs_reference": round(float(np.abs(probs - ref_probs).max()), 4),
+            "mean_prob_delta_vs_reference": round(float(np.abs(probs - ref_probs).mean()), 5),
+            "model_bytes": detector.variable_bytes,
+            "load_rss_delta_mb": round(rss / (1024 * 1024), 2),
+            "load_time_ms": round(load_ms, 1),
+            **latency(detector, images[0], iterations),
+        }
+        if labels is not None:
+            entry["accuracy"] = round(float((probs.argmax(1) == labels).mean()), 4)
+        report["engines"][name] = entry
+
+    if labels is not None:
+        report["reference_accuracy"] = round(float((ref_probs.argmax(1) == labels).mean()), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crops", default=",".join(get_available_crops()))
+    parser.add_argument("--data", help="PlantVillage-style labeled image directory")
+    parser.add_argument("--per-class", type=int, default=20)
+    parser.add_argument("--synthetic", type=int, default=32, help="Synthetic images when --data is not given")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    report = {
+        crop: compare_crop(crop, args.data, args.per_class, args.synthetic, args.iterations)
+        for crop in args.crops.split(",")
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
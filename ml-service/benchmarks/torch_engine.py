@@ -0,0 +1,216 @@
+"""
+Compare the eager and TorchScript engines of the legacy PyTorch path
+
+Both engines are built through DiseaseDetectionModel with the same weights:
+MODEL_PATH if given, otherwise one randomly initialized state dict written to
+a temporary file (latency does not depend on the weights). Each engine times
+preprocessing plus prediction for synthetic JPEGs at batch size 1, once per
+--threads setting, and reports how far its probabilities are from eager.
+
+For reference, the TensorFlow path (TFImagePreprocessor + the --tf-crop
+detector from create_detector, so MODEL_BACKEND applies) is timed on the
+same images with the same thread count.
+
+With --compare, only the model calls are timed instead: both engines get the
+very same preprocessed tensors, and their calls alternate (eager first on
+even iterations, TorchScript first on odd ones) so that clock or thermal
+drift hits both equally. Reports p50/p95 per engine and the speedups.
+
+Usage:
+    python -m benchmarks.torch_engine
+    python -m benchmarks.torch_engine --model-path models/disease_model.pth --threads 1,2,4 --tf-crop tomato
+    python -m benchmarks.torch_engine --compare --threads 1,4 --iterations 200
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+from app.models.disease_detector import DiseaseDetectionModel
+from app.services.inference import configure_torch_threads
+from app.services.preprocessing import ImagePreprocessor
+from benchmarks.images import make_jpeg, to_base64
+
+
+def probabilities(model: DiseaseDetectionModel, tensor: torch.Tensor) -> np.ndarray:
+    """Class probabilities in class order"""
+    index = {c["name"]: i for i, c in enumerate(model.classes)}
+    probs = np.zeros(len(model.classes))
+    for pred in model.predict(tensor, top_k=len(model.classes)):
+        probs[index[pred["class_name"]]] = pred["confidence"]
+    return probs
+
+
+def summarize(timings: List[float]) -> Dict:
+    """p50 / p95 / mean of latencies in milliseconds"""
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+    }
+
+
+def time_requests(run: Callable[[str], object], images: List[str], iterations: int) -> Dict:
+    """Latency of preprocess + predict for one image, cycling through the images"""
+    timings = []
+    for i in range(iterations):
+        image = images[i % len(images)]
+        start = time.perf_counter()
+        run(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def bench_engine(engine: str, model_path: str, images: List[str], iterations: int) -> Dict:
+    model = DiseaseDetectionModel(num_classes=25, model_path=model_path, engine=engine)
+
+    start = time.perf_counter()
+    model.load_model()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    preprocessor = ImagePreprocessor(target_size=(224, 224), channels_last=model.channels_last)
+    tensors = [preprocessor.preprocess_from_base64(image) for image in images]
+    model.predict(tensors[0], top_k=3)
+
+    return {
+        "load_ms": round(load_ms, 1),
+        **time_requests(lambda image: model.predict(preprocessor.preprocess_from_base64(image), top_k=3),
+                        images, iterations),
+        "probabilities": np.stack([probabilities(model, tensor) for tensor in tensors]),
+    }
+
+
+def compare_engines(model_path: str, images: List[str], iterations: int) -> Dict:
+    """Model-call latency of eager vs TorchScript on identical tensors, interleaved"""
+    eager = DiseaseDetectionModel(num_classes=25, model_path=model_path, engine="eager")
+    scripted = DiseaseDetectionModel(num_classes=25, model_path=model_path, engine="torchscript")
+    eager.load_model()
+    scripted.load_model()
+
+    preprocessor = ImagePreprocessor(target_size=(224, 224))
+    tensors = [preprocessor.preprocess_from_base64(image) for image in images]
+    # Converted once here, so predict()'s layout conversion is a no-op inside the timed call
+    scripted_tensors = [
+        tensor.contiguous(memory_format=torch.channels_last) if scripted.channels_last else tensor
+        for tensor in tensors
+    ]
+    for tensor, scripted_tensor in zip(tensors, scripted_tensors):
+        eager.predict(tensor, top_k=3)
+        scripted.predict(scripted_tensor, top_k=3)
+
+    timings = {"eager": [], "torchscript": []}
+    for i in range(iterations):
+        k = i % len(tensors)
+        calls = [("eager", eager, tensors[k]), ("torchscript", scripted, scripted_tensors[k])]
+        for name, model, tensor in (calls if i % 2 == 0 else calls[::-1]):
+            start = time.perf_counter()
+            model.predict(tensor, top_k=3)
+            timings[name].append((time.perf_counter() - start) * 1000)
+
+    eager_stats = summarize(timings["eager"])
+    scripted_stats = summarize(timings["torchscript"])
+    eager_probs = np.stack([probabilities(eager, tensor) for tensor in tensors])
+    scripted_probs = np.stack([probabilities(scripted, tensor) for tensor in scripted_tensors])
+    return {
+        "images": len(tensors),
+        "iterations": iterations,
+        "eager": eager_stats,
+        "torchscript": scripted_stats,
+        "speedup_p50": round(eager_stats["p50_ms"] / scripted_stats["p50_ms"], 2),
+        "speedup_p95": round(eager_stats["p95_ms"] / scripted_stats["p95_ms"], 2),
+        "top1_agreement": float((scripted_probs.argmax(1) == eager_probs.argmax(1)).mean()),
+        "max_prob_delta": float(np.abs(scripted_probs - eager_probs).max()),
+    }
+
+
+def bench_tf(crop: str, threads: int, images: List[str], iterations: int) -> Dict:
+    """Latency of the TensorFlow offline path on the same images"""
+    import tensorflow as tf
+
+    from app.config import settings
+    from app.models.tf_disease_detector import create_detector
+    from app.services.tf_preprocessing import TFImagePreprocessor
+
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+    detector = create_detector(crop)
+
+    start = time.perf_counter()
+    detector.load_model()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    preprocessor = TFImagePreprocessor(256, settings.PREPROCESS_MODE, settings.JPEG_DRAFT_DECODE,
+                                       dtype=settings.MODEL_INPUT_DTYPE)
+    return {
+        "crop": crop,
+        "backend": detector.backend,
+        "load_ms": round(load_ms, 1),
+        **time_requests(lambda image: detector.predict(preprocessor.preprocess_from_base64(image), top_k=3),
+                        images, iterations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=os.getenv("MODEL_PATH"), help="Local state dict (.pth)")
+    parser.add_argument("--threads", default="0", help="Comma separated intra-op thread counts (0 = default)")
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--tf-crop", default="tomato", help="Crop model of the TensorFlow path to compare ('' = skip)")
+    parser.add_argument("--compare", action="store_true",
+                        help="Time only the model calls of both engines, interleaved on identical tensors")
+    args = parser.parse_args()
+
+    model_path = args.model_path
+    if not model_path or not os.path.exists(model_path):
+        reference = DiseaseDetectionModel(num_classes=25)._create_model()
+        model_path = os.path.join(tempfile.mkdtemp(), "random_mobilenet_v2.pth")
+        torch.save(reference.state_dict(), model_path)
+
+    images = [to_base64(make_jpeg((640, 480), seed)) for seed in range(args.images)]
+
+    report = {}
+    if args.compare:
+        for threads in (int(t) for t in args.threads.split(",")):
+            configure_torch_threads(threads)
+            report[f"threads_{torch.get_num_threads()}"] = compare_engines(model_path, images, args.iterations)
+        print(json.dumps(report, indent=2))
+        return
+
+    # TensorFlow fixes its thread count at first use, so the TF path is timed once
+    tf_threads = int(args.threads.split(",")[0])
+    if args.tf_crop:
+        report["tensorflow"] = {"threads": tf_threads or "default",
+                                **bench_tf(args.tf_crop, tf_threads, images, args.iterations)}
+
+    for threads in (int(t) for t in args.threads.split(",")):
+        configure_torch_threads(threads)
+        eager = bench_engine("eager", model_path, images, args.iterations)
+        scripted = bench_engine("torchscript", model_path, images, args.iterations)
+
+        eager_probs = eager.pop("probabilities")
+        scripted_probs = scripted.pop("probabilities")
+        report[f"threads_{torch.get_num_threads()}"] = {
+            "eager": eager,
+            "torchscript": scripted,
+            "speedup_p50": round(eager["p50_ms"] / scripted["p50_ms"], 2),
+            "top1_agreement": float((scripted_probs.argmax(1) == eager_probs.argmax(1)).mean()),
+            "max_prob_delta": float(np.abs(scripted_probs - eager_probs).max()),
+        }
+        if "tensorflow" in report:
+            report[f"threads_{torch.get_num_threads()}"]["torchscript_vs_tf_p50"] = round(
+                report["tensorflow"]["p50_ms"] / scripted["p50_ms"], 2
+            )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
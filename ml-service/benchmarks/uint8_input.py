@@ -0,0 +1,153 @@
+"""
+Measure the uint8 input path against float32 preprocessing
+
+For one crop, compares:
+- preprocessing (decode + resize + array) of synthetic JPEGs with the float32
+  and uint8 preprocessors: latency, input tensor bytes and peak NumPy
+  allocation (tracemalloc) per image
+- model calls at batch 1 and --batch-size: the float32 rebuild of the
+  inference graph vs the uint8 export of the same graph (apples to apples),
+  and the original SavedModel that MODEL_INPUT_DTYPE=float32 serves
+- end to end (preprocess + TFDiseaseDetector.predict_batch) for both settings
+- predictions: the uint8 path must be bitwise identical to the float32 rebuild
+
+The uint8 model is taken from "uint8_model_path" if it was exported, otherwise
+it is exported to a temporary directory first.
+
+Usage:
+    python -m benchmarks.uint8_input
+    python -m benchmarks.uint8_input --crop potato --iterations 200 --batch-size 8
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import tensorflow as tf
+
+from app.config import settings
+from app.models.inference_graph import build_inference_module
+from app.models.tf_disease_detector import (
+    TFDiseaseDetector,
+    load_crop_config,
+    resolve_model_path,
+    resolve_uint8_model_path
+)
+from app.models.uint8_export import export_crop
+from app.services.tf_preprocessing import TFImagePreprocessor
+from benchmarks.images import make_jpeg
+
+
+def time_ms(fn: Callable, iterations: int) -> Dict:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(statistics.median(timings), 3), "mean_ms": round(statistics.fmean(timings), 3)}
+
+
+def peak_alloc_kb(fn: Callable) -> float:
+    """Peak traced (NumPy / Python) allocation of one call"""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def bench_preprocess(images: List[bytes], iterations: int) -> Dict:
+    report = {}
+    for dtype in ("float32", "uint8"):
+        preprocessor = TFImagePreprocessor(256, "resize", settings.JPEG_DRAFT_DECODE, dtype=dtype)
+        image = images[0]
+        report[dtype] = {
+            **time_ms(lambda: preprocessor.preprocess_from_bytes(image), iterations),
+            "tensor_bytes": preprocessor.preprocess_from_bytes(image).nbytes,
+            "peak_alloc_kb": peak_alloc_kb(lambda: preprocessor.preprocess_from_bytes(image)),
+        }
+    return report
+
+
+def load_detector(crop: str, dtype: str, uint8_path: str) -> TFDiseaseDetector:
+    settings.MODEL_INPUT_DTYPE = dtype
+    detector = TFDiseaseDetector(crop, backend="savedmodel")
+    detector.crop_config['uint8_model_path'] = uint8_path
+    detector.load_model()
+    return detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crop", default="tomato")
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    crop_config = load_crop_config(args.crop)
+    model_path = resolve_model_path(crop_config['model_path'])
+    uint8_path = resolve_uint8_model_path(crop_config)
+    if not os.path.exists(uint8_path):
+        uint8_path = export_crop(args.crop, os.path.join(tempfile.mkdtemp(), args.crop))
+
+    images = [make_jpeg((1280, 960), seed) for seed in range(args.images)]
+    report = {"crop": args.crop, "preprocess": bench_preprocess(images, args.iterations)}
+
+    float_pre = TFImagePreprocessor(256, "resize", settings.JPEG_DRAFT_DECODE, dtype="float32")
+    uint8_pre = TFImagePreprocessor(256, "resize", settings.JPEG_DRAFT_DECODE, dtype="uint8")
+    float_batch = np.concatenate([float_pre.preprocess_from_bytes(image) for image in images])
+    uint8_batch = np.concatenate([uint8_pre.preprocess_from_bytes(image) for image in images])
+
+    rebuilt = build_inference_module(model_path).serve
+    original = tf.saved_model.load(model_path).signatures["serving_default"]
+    exported = tf.saved_model.load(uint8_path).signatures["serving_default"]
+
+    rebuilt_probs = rebuilt(tf.constant(float_batch))["output_0"].numpy()
+    exported_probs = list(exported(tf.constant(uint8_batch)).values())[0].numpy()
+    report["predictions"] = {
+        "images": len(images),
+        "inputs_identical": bool(np.array_equal(float_batch, uint8_batch.astype(np.float32))),
+        "bitwise_identical": bool(np.array_equal(rebuilt_probs, exported_probs)),
+        "max_abs_diff": float(np.abs(rebuilt_probs - exported_probs).max()),
+    }
+
+    report["model_call"] = {}
+    for batch_size in sorted({1, args.batch_size}):
+        f32 = float_batch[:batch_size]
+        u8 = uint8_batch[:batch_size]
+        report["model_call"][f"batch_{batch_size}"] = {
+            "original_float32": time_ms(lambda: original(tf.convert_to_tensor(f32)), args.iterations),
+            "rebuilt_float32": time_ms(lambda: rebuilt(tf.convert_to_tensor(f32)), args.iterations),
+            "export_uint8": time_ms(lambda: exported(tf.convert_to_tensor(u8)), args.iterations),
+        }
+
+    report["end_to_end"] = {}
+    for dtype, preprocessor in (("float32", float_pre), ("uint8", uint8_pre)):
+        detector = load_detector(args.crop, dtype, uint8_path)
+        image = images[0]
+        batch = images[:args.batch_size]
+        report["end_to_end"][dtype] = {
+            "model_input_dtype": np.dtype(detector.input_dtype).name,
+            "batch_1": time_ms(
+                lambda: detector.predict_batch(preprocessor.preprocess_from_bytes(image), top_k=3),
+                args.iterations
+            ),
+            f"batch_{args.batch_size}": time_ms(
+                lambda: detector.predict_batch(
+                    np.concatenate([preprocessor.preprocess_from_bytes(b) for b in batch]), top_k=3
+                ),
+                max(1, args.iterations // 4)
+            ),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Shared fixtures: every test runs the service on the mock backend, without TensorFlow"""
+import pytest
+
+from app.config import settings
+
+MOCK_SETTINGS = {
+    "MODEL_BACKEND": "mock",
+    "MODEL_LOADING": "eager",
+    "BACKGROUND_MODEL_LOADING": False,
+    "MOCK_LATENCY_DISTRIBUTION": "fixed",
+    "MOCK_LATENCY_P50_MS": 200,
+    "MOCK_LATENCY_P99_MS": 200,
+    "MOCK_LOAD_TIME_MS": 0,
+    "BATCHING_ENABLED": True,
+    "BATCH_MAX_SIZE": 1,
+    "PREDICTION_CACHE_ENABLED": False,
+    "ONLINE_CACHE_ENABLED": False,
+}
+
+
+@pytest.fixture(scope="session")
+def mock_settings():
+    """Apply MOCK_SETTINGS for the test session and restore the previous values afterwards"""
+    saved = {name: getattr(settings, name) for name in MOCK_SETTINGS}
+    for name, value in MOCK_SETTINGS.items():
+        setattr(settings, name, value)
+    try:
+        yield settings
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+@pytest.fixture(scope="session")
+def main_module(mock_settings):
+    """app.main imported with the mock settings (it builds its service at import)"""
+    from app import main
+    return main
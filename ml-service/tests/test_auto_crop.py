@@ -0,0 +1,35 @@
+"""Crop auto-detect scoring (mock backend, no TensorFlow)"""
+import numpy as np
+import pytest
+
+from app.services.tf_inference import DiseaseInferenceService
+from benchmarks.images import make_jpeg, to_base64
+
+certainty = DiseaseInferenceService._distribution_certainty
+
+
+def test_certainty_is_comparable_across_class_counts():
+    assert certainty(np.full(2, 1 / 2))[0] == pytest.approx(0)
+    assert certainty(np.full(10, 1 / 10))[0] == pytest.approx(0)
+    assert certainty(np.array([1.0, 0, 0]))[0] == pytest.approx(1, abs=1e-6)
+    # A 2-class model at 0.6 is less sure than a 10-class model at 0.6
+    assert certainty(np.array([0.6, 0.4]))[0] < certainty(np.array([0.6] + [0.4 / 9] * 9))[0]
+
+
+def test_saturated_outputs_are_separated_by_log_odds():
+    sharp = certainty(np.array([1 - 1e-7, 1e-7, 0, 0]))
+    softer = certainty(np.array([1 - 1e-4, 1e-4, 0]))
+    assert sharp[1] > softer[1]
+
+
+def test_auto_response_reports_ambiguity(main_module):
+    result = main_module.disease_service.detect_disease_offline(
+        to_base64(make_jpeg((64, 64), 3)), "auto", top_k=2
+    )
+
+    assert result["success"] is True
+    assert len(result["predictions"]) == 2
+    assert isinstance(result["ambiguous"], bool)
+    scores = result["crop_scores"]
+    ranked = sorted(scores, key=lambda c: (-scores[c]["score"], -scores[c]["log_odds"], c))
+    assert result["detected_crop"] == ranked[0]
@@ -0,0 +1,98 @@
+"""Unit tests for MicroBatcher flush behaviour (mock backend, no TensorFlow)"""
+import threading
+import time
+
+import numpy as np
+
+from app.models.mock_detector import MockDiseaseDetector
+from app.services.batching import MicroBatcher
+
+
+def make_image(size=32):
+    return np.zeros((1, size, size, 3), dtype=np.float32)
+
+
+class RecordingModel:
+    """predict_batch stand-in that records the size of every call"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, image_arrays, top_k):
+        self.batch_sizes.append(len(image_arrays))
+        return [[{"index": i, "top_k": k}] for i, k in enumerate(top_k)]
+
+
+def test_flushes_when_batch_is_full():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=4, max_wait_ms=10_000)
+
+    start = time.monotonic()
+    futures = [batcher.submit(make_image(), top_k=k) for k in range(1, 5)]
+    results = [future.result(timeout=5) for future in futures]
+
+    # A full batch must not wait for the 10 s window
+    assert time.monotonic() - start < 5
+    assert model.batch_sizes == [4]
+    assert [result[0]["top_k"] for result in results] == [1, 2, 3, 4]
+    assert batcher.get_stats()["max_batch_seen"] == 4
+
+
+def test_flushes_partial_batch_after_max_wait():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=8, max_wait_ms=100)
+
+    start = time.monotonic()
+    futures = [batcher.submit(make_image()) for _ in range(3)]
+    for future in futures:
+        future.result(timeout=5)
+    elapsed = time.monotonic() - start
+
+    assert model.batch_sizes == [3]
+    assert 0.09 <= elapsed < 5
+    assert batcher.get_stats()["queued"] == 0
+
+
+def test_only_stacks_matching_shapes():
+    model = RecordingModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=8, max_wait_ms=50)
+
+    futures = [batcher.submit(make_image(32)), batcher.submit(make_image(64)), batcher.submit(make_image(32))]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert sorted(model.batch_sizes) == [1, 2]
+
+
+def test_model_error_reaches_every_caller():
+    def failing(image_arrays, top_k):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(failing, max_batch_size=2, max_wait_ms=1_000)
+    futures = [batcher.submit(make_image()) for _ in range(2)]
+
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+
+
+def test_batches_concurrent_callers_on_mock_detector():
+    detector = MockDiseaseDetector("tomato", p50_ms=5, p99_ms=10, seed=0)
+    detector.load_model()
+    batcher = MicroBatcher(detector.predict_batch, name="tomato", max_batch_size=4, max_wait_ms=200)
+
+    results = [None] * 8
+
+    def call(index):
+        results[index] = batcher.predict(make_image(256), top_k=2)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    stats = batcher.get_stats()
+    assert all(result is not None and len(result) == 2 for result in results)
+    assert stats["images_processed"] == 8
+    assert stats["max_batch_seen"] == 4
+    assert stats["batches_run"] <= 4
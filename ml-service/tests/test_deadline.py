@@ -0,0 +1,112 @@
+"""Unit tests for request deadlines and cancellation (mock backend, no TensorFlow)"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services.deadline import CancelToken, RequestCancelled, parse_timeout_header
+from app.services.prediction_cache import PredictionCache
+from benchmarks.images import make_jpeg, to_base64
+
+
+@pytest.fixture(scope="module")
+def service(mock_settings):
+    from app.services.tf_inference import DiseaseInferenceService
+    return DiseaseInferenceService()
+
+
+def test_token_without_deadline_never_expires():
+    token = CancelToken.from_timeout(None)
+    assert token.remaining() is None
+    assert token.reason is None
+    token.check("inference")
+    assert CancelToken.from_timeout(0).deadline is None
+
+
+def test_deadline_expiry_raises_at_next_check():
+    token = CancelToken.from_timeout(0.05)
+    token.check("preprocess")
+    assert 0 < token.remaining() <= 0.05
+
+    time.sleep(0.06)
+    assert token.reason == "deadline"
+    with pytest.raises(RequestCancelled) as excinfo:
+        token.check("inference")
+    assert excinfo.value.reason == "deadline"
+    assert excinfo.value.stage == "inference"
+    assert excinfo.value.token is token
+
+
+def test_disconnect_takes_precedence_over_deadline():
+    token = CancelToken(deadline=time.monotonic() - 1)
+    token.cancel()
+    with pytest.raises(RequestCancelled) as excinfo:
+        token.check("preprocess")
+    assert excinfo.value.reason == "disconnected"
+
+
+def test_parse_timeout_header():
+    assert parse_timeout_header("250") == 0.25
+    assert parse_timeout_header(None) is None
+    assert parse_timeout_header("") is None
+    assert parse_timeout_header("-5") is None
+    assert parse_timeout_header("soon") is None
+
+
+def test_expired_request_is_shed_before_preprocessing(service):
+    token = CancelToken(deadline=time.monotonic() - 1)
+    result = service.detect_disease_offline(to_base64(make_jpeg((64, 64), 0)), "tomato", cancel=token)
+
+    assert result["success"] is False
+    assert result["error_type"] == "deadline_exceeded"
+    assert result["stage"] == "preprocess"
+
+
+def test_request_expiring_in_batch_queue_is_withdrawn(service):
+    image = np.zeros((1, 256, 256, 3), dtype=np.float32)
+    batcher = service._get_batcher("tomato")
+    busy = batcher.submit(image)
+    processed = batcher.get_stats()["images_processed"]
+
+    # The batcher is busy for 200 ms, so this request expires while still queued
+    with pytest.raises(RequestCancelled) as excinfo:
+        service._predict("tomato", image, 3, cancel=CancelToken.from_timeout(0.05))
+    assert excinfo.value.stage == "inference"
+
+    busy.result(timeout=5)
+    time.sleep(0.3)
+    # Only the first request reached the model
+    assert batcher.get_stats()["images_processed"] == processed + 1
+
+
+def test_auto_crop_stops_waiting_at_the_deadline(service):
+    start = time.monotonic()
+    result = service.detect_disease_offline(
+        to_base64(make_jpeg((64, 64), 1)), "auto", cancel=CancelToken.from_timeout(0.05)
+    )
+
+    # Every crop model takes 200 ms; the request gives up at 50 ms
+    assert result["error_type"] == "deadline_exceeded"
+    assert result["stage"] == "inference"
+    assert time.monotonic() - start < 0.15
+
+
+def test_cache_follower_stops_waiting_at_its_own_deadline():
+    cache = PredictionCache()
+    release = threading.Event()
+    leader = threading.Thread(target=cache.get_or_compute, args=("key", lambda: release.wait(5)))
+    leader.start()
+    while cache.get_stats()["inflight"] == 0:
+        time.sleep(0.005)
+
+    start = time.monotonic()
+    with pytest.raises(RequestCancelled) as excinfo:
+        cache.get_or_compute("key", lambda: "never runs", cancel=CancelToken.from_timeout(0.05))
+    assert excinfo.value.reason == "deadline"
+    assert time.monotonic() - start < 0.15
+
+    # The leader's computation is shared by others and is not cancelled
+    release.set()
+    leader.join(timeout=5)
+    assert cache.get_or_compute("key", lambda: "recomputed") == (True, "hit")
@@ -0,0 +1,70 @@
+"""Unit tests for the bounded inference executor and its 503 path (mock backend, no TensorFlow)"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.services.executor import InferenceExecutor, QueueFullError
+from benchmarks.images import make_jpeg, to_base64
+
+
+def test_rejects_beyond_workers_plus_queue():
+    async def scenario():
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1, retry_after=7)
+        release = threading.Event()
+        running = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        assert executor.queue_depth == 1
+        with pytest.raises(QueueFullError) as excinfo:
+            await executor.run(lambda: "never runs")
+        assert excinfo.value.retry_after == 7
+
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        # Capacity is released once calls finish
+        assert await executor.run(lambda: "ok") == "ok"
+
+        stats = executor.get_stats()
+        executor.shutdown()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+    assert stats["queue_depth"] == 0
+
+
+def test_errors_propagate_and_free_the_slot():
+    async def scenario():
+        executor = InferenceExecutor(max_workers=1, max_queue_size=0)
+
+        def failing():
+            raise RuntimeError("model failed")
+
+        with pytest.raises(RuntimeError):
+            await executor.run(failing)
+        result = await executor.run(lambda: "ok")
+        executor.shutdown()
+        return result
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_full_queue_returns_503_with_retry_after(main_module, monkeypatch):
+    monkeypatch.setattr(main_module, "inference_executor", InferenceExecutor(max_workers=1, max_queue_size=0, retry_after=3))
+    body = {"image_base64": to_base64(make_jpeg((64, 64), 0)), "crop": "tomato"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[client.post("/ml/detect-disease", json=body) for _ in range(2)])
+
+    responses = asyncio.run(scenario())
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 503]
+
+    rejected = next(response for response in responses if response.status_code == 503)
+    assert rejected.headers["Retry-After"] == "3"
+    assert main_module.inference_executor.get_stats()["rejected"] == 1
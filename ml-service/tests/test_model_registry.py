@@ -0,0 +1,45 @@
+"""ModelRegistry load-failure backoff (mock backend, no TensorFlow)"""
+import time
+
+import pytest
+
+from app.models.mock_detector import MockDiseaseDetector
+from app.services.model_registry import ModelLoadError, ModelRegistry
+
+
+class FlakyFactory:
+    """Creates mock detectors whose first `failures` loads raise"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, crop: str):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise MemoryError("transient load failure")
+        return MockDiseaseDetector(crop, p50_ms=1, p99_ms=2)
+
+
+def test_failed_lazy_load_is_retried_after_backoff():
+    factory = FlakyFactory(failures=1)
+    registry = ModelRegistry(["tomato"], factory, lazy=True, retry_after_s=0.1)
+
+    with pytest.raises(ModelLoadError):
+        with registry.acquire("tomato"):
+            pass
+    assert not registry.is_available("tomato")
+    assert registry.get_models_info()["tomato"]["load_error"] == "transient load failure"
+
+    # Within the backoff the failure is reported without another load attempt
+    with pytest.raises(ModelLoadError):
+        with registry.acquire("tomato"):
+            pass
+    assert factory.calls == 1
+
+    time.sleep(0.12)
+    assert registry.is_available("tomato")
+    with registry.acquire("tomato") as detector:
+        assert detector.model is not None
+    assert factory.calls == 2
+    assert "load_error" not in registry.get_models_info()["tomato"]
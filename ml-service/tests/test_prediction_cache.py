@@ -0,0 +1,120 @@
+"""Unit tests for the single-flight PredictionCache (mock backend, no TensorFlow)"""
+import threading
+import time
+
+import numpy as np
+
+from app.models.mock_detector import MockDiseaseDetector
+from app.services.prediction_cache import PredictionCache
+
+
+def run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+
+def test_concurrent_misses_compute_once():
+    detector = MockDiseaseDetector("tomato", p50_ms=5, p99_ms=10, seed=0)
+    detector.load_model()
+    image = np.zeros((1, 256, 256, 3), dtype=np.float32)
+
+    cache = PredictionCache()
+    key = cache.make_key(b"leaf", "tomato", 3)
+    calls = []
+    statuses = []
+    results = []
+    lock = threading.Lock()
+
+    def compute():
+        calls.append(1)
+        # Hold the computation until every other caller is waiting on it
+        deadline = time.monotonic() + 5
+        while cache.shared < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return detector.predict(image, top_k=3)
+
+    def lookup():
+        result, status = cache.get_or_compute(key, compute)
+        with lock:
+            statuses.append(status)
+            results.append(result)
+
+    run_concurrently(6, lookup)
+
+    assert len(calls) == 1
+    assert sorted(statuses) == ["miss"] + ["shared"] * 5
+    assert all(result == results[0] for result in results)
+
+    # Callers own their copy
+    results[0][0]["confidence"] = -1
+    assert cache.get_or_compute(key, compute)[0][0]["confidence"] != -1
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_exception_reaches_waiters_and_is_not_cached():
+    cache = PredictionCache()
+    key = cache.make_key(b"leaf", "tomato")
+    started = threading.Event()
+    calls = []
+    errors = []
+    lock = threading.Lock()
+
+    def failing():
+        calls.append(1)
+        started.set()
+        deadline = time.monotonic() + 5
+        while cache.shared < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        raise RuntimeError("model failed")
+
+    def lookup():
+        try:
+            cache.get_or_compute(key, failing)
+        except RuntimeError as e:
+            with lock:
+                errors.append(e)
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    started.wait(timeout=5)
+    run_concurrently(3, lookup)
+    leader.join(timeout=10)
+
+    assert len(calls) == 1
+    assert len(errors) == 4
+    assert cache.get_stats()["inflight"] == 0
+
+    # The failure is not stored, so the next lookup computes again
+    assert cache.get_or_compute(key, lambda: "ok") == ("ok", "miss")
+
+
+def test_uncacheable_results_are_not_stored():
+    cache = PredictionCache()
+    key = cache.make_key(b"leaf")
+    error = {"success": False}
+
+    cache.get_or_compute(key, lambda: error, cacheable=lambda r: r["success"])
+    assert cache.get_or_compute(key, lambda: {"success": True}, cacheable=lambda r: r["success"])[1] == "miss"
+
+
+def test_ttl_and_lru_eviction():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0.05)
+    for name in ("a", "b", "c"):
+        cache.get_or_compute(name, lambda: name)
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get_or_compute("c", lambda: "fresh") == ("fresh", "miss")
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_keys_depend_on_content_and_params():
+    assert PredictionCache.make_key(b"a", "tomato") != PredictionCache.make_key(b"b", "tomato")
+    assert PredictionCache.make_key(b"a", "tomato") != PredictionCache.make_key(b"a", "potato")
+    assert PredictionCache.make_key(b"a", "tomato", 3) == PredictionCache.make_key(b"a", "tomato", 3)
@@ -0,0 +1,71 @@
+"""Upload size limit without a Content-Length (mock backend, no TensorFlow)"""
+import asyncio
+
+import httpx
+
+from benchmarks.images import make_jpeg
+
+
+def post_chunked(main_module, url, chunks, headers):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(url, content=body(), headers=headers)
+
+    return asyncio.run(scenario())
+
+
+def test_chunked_raw_upload_over_limit_is_413(main_module, monkeypatch):
+    monkeypatch.setattr(main_module.settings, "IMAGE_MAX_BYTES", 10_000)
+    chunks = [b"\xff" * 4096] * 4
+
+    response = post_chunked(
+        main_module, "/ml/detect-disease/upload?crop=tomato", chunks, {"Content-Type": "image/jpeg"}
+    )
+
+    assert response.status_code == 413
+    assert "10000" in response.json()["detail"]
+
+
+def test_chunked_raw_upload_under_limit_is_served(main_module, monkeypatch):
+    image = make_jpeg((64, 64), 0)
+    monkeypatch.setattr(main_module.settings, "IMAGE_MAX_BYTES", len(image) + 1)
+    chunks = [image[i:i + 512] for i in range(0, len(image), 512)]
+
+    response = post_chunked(
+        main_module, "/ml/detect-disease/upload?crop=tomato", chunks, {"Content-Type": "image/jpeg"}
+    )
+
+    assert response.status_code == 200
+
+
+def test_chunked_multipart_upload_over_limit_is_413(main_module, monkeypatch):
+    monkeypatch.setattr(main_module.settings, "IMAGE_MAX_BYTES", 10_000)
+    boundary = "test-boundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"image\"; filename=\"leaf.jpg\"\r\n"
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + b"\xff" * 200_000 + f"\r\n--{boundary}--\r\n".encode()
+    chunks = [body[i:i + 8192] for i in range(0, len(body), 8192)]
+
+    response = post_chunked(
+        main_module, "/ml/detect-disease/upload?crop=tomato", chunks,
+        {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+
+    assert response.status_code == 413
+
+
+def test_multipart_upload_is_parsed_from_the_bounded_body(main_module):
+    files = {"image": ("leaf.jpg", make_jpeg((64, 64), 0), "image/jpeg")}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/ml/detect-disease/upload", files=files, data={"crop": "tomato"})
+
+    assert asyncio.run(scenario()).status_code == 200
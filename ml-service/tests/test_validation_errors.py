@@ -0,0 +1,54 @@
+"""Bad request input must map to 400 bad_request, not 500 (mock backend, no TensorFlow)"""
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.images import make_jpeg, to_base64
+
+BAD_BASE64 = "data:image/jpeg;base64,@@not base64@@"
+
+
+def post(main_module, path, body):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body)
+
+    return asyncio.run(scenario())
+
+
+def bad_request_count(main_module, mode):
+    requests = main_module.metrics.REQUESTS
+    return requests._values.get(requests._key({"crop": "tomato", "mode": mode, "outcome": "bad_request"}), 0)
+
+
+def test_validation_error_maps_to_400(main_module):
+    status, outcome, detail, headers = main_module.classify_failure(
+        {"success": False, "error": "Invalid base64 image", "error_type": "validation_error"}
+    )
+    assert (status, outcome, headers) == (400, "bad_request", None)
+    assert detail == "Invalid base64 image"
+
+
+def test_single_image_with_bad_base64_is_400(main_module):
+    before = bad_request_count(main_module, "offline")
+    response = post(main_module, "/ml/detect-disease", {"image_base64": BAD_BASE64, "crop": "tomato"})
+
+    assert response.status_code == 400
+    assert bad_request_count(main_module, "offline") == before + 1
+
+
+def test_batch_line_with_bad_base64_is_400(main_module):
+    before = bad_request_count(main_module, "offline")
+    good = to_base64(make_jpeg((64, 64), 0))
+    response = post(main_module, "/ml/detect-disease/batch", {
+        "crop": "tomato",
+        "images": [{"image_base64": good, "id": "good"}, {"image_base64": BAD_BASE64, "id": "bad"}]
+    })
+
+    lines = {line["id"]: line for line in map(json.loads, response.text.splitlines())}
+    assert lines["good"]["status"] == 200
+    assert lines["bad"]["status"] == 400
+    assert lines["bad"]["error_type"] == "validation_error"
+    assert bad_request_count(main_module, "offline") == before + 1